@@ -5,9 +5,12 @@ the form of grammatical relations (GR's) so that it can be processed
 
 
 import os
+import multiprocessing
 import operator
 import math
+import json
 import numpy as np
+import Helper
 from collections import defaultdict, namedtuple
 
 
@@ -21,11 +24,13 @@ from collections import defaultdict, namedtuple
 Construction graph
 
 	Stores a list of GR's in a graphical form
-	Contains methods to find a path between two nodes
+	Contains a method to find every node with a path to a node
 '''
 class ConstructionGraph():
 	def __init__(self, connections):
 		self._graph = defaultdict(set)
+		#_reverse[node2] contains every node1 with an edge node1->node2
+		self._reverse = defaultdict(set)
 		self.add_connections(connections)
 
 	def add_connections(self, connections):
@@ -34,19 +39,20 @@ class ConstructionGraph():
 
 	def add(self, node1, node2):
 		self._graph[node1].add(node2)
-
-	def find_path(self, node1, node2, path=[]):
-		path = path + [node1]
-		if node1 == node2:
-			return path
-		if node1 not in self._graph:
-			return None
-		for node in self._graph[node1]:
-			if node not in path:
-				new_path = self.find_path(node, node2, path)
-				if new_path:
-					return new_path
-		return None
+		self._reverse[node2].add(node1)
+
+	#returns the set of nodes that have a path to node (including node).
+	#Visits every edge at most once
+	def find_reaching(self, node):
+		reaching = set([node])
+		stack = [node]
+		while (stack):
+			curr = stack.pop()
+			for prev in self._reverse.get(curr, ()):
+				if (prev not in reaching):
+					reaching.add(prev)
+					stack.append(prev)
+		return reaching
 
 
 '''
@@ -58,37 +64,34 @@ Prune graph
 	outputs: returns a modified construction that prunes any
 	nodes that contain unwanted GR's or are not connected to 
 	the ROOT node
+
+	runs in time linear in the number of GR's
 '''
 def prune_graph(construction):
 	#CHILDES constructions that aren't involved in the verb construction
-	remove_constructions = ['APP', 'CJCT', 'CMOD', 'COM', 
+	remove_constructions = set(['APP', 'CJCT', 'CMOD', 'COM', 
 		'CONJ', 'COORD', 'DATE', 'DET', 'ENUM', 'JCT', 'LINK', 
 		'MOD', 'NEG', 'NJCT', 'POSS', 'POSTMOD', 'PQ', 'PUNC', 
-		'PUNCT', 'QUANT', 'XJCT', 'XMOD']
+		'PUNCT', 'QUANT', 'XJCT', 'XMOD'])
 
 	#remove any GR's not related to verb construction
-	for i in range(len(construction)):
-		for const in remove_constructions:
-			for word in construction:
-				curr = word.split("|")
-				try:
-					if (const == curr[2]):
-						construction.remove(word)
-				except:
-					pass
-
+	kept = []
 	connections = []
 	for word in construction:
-		word = word.split("|")
-		connections.append([int(word[0]), int(word[1])])
+		curr = word.split("|")
+		if (len(curr) > 2 and curr[2] in remove_constructions):
+			continue
+		kept.append(word)
+		connections.append([int(curr[0]), int(curr[1])])
 	#construct graph
 	graph = ConstructionGraph(connections)
 
+	#keep the GR's whose node has a path to the root (node 0)
+	connected = graph.find_reaching(0)
 	pruned = []
-	for word in construction:
-		curr = word.split("|")
-		if (graph.find_path(int(curr[0]), 0)):
-			pruned.append(word)
+	for i in range(len(kept)):
+		if (connections[i][0] in connected):
+			pruned.append(kept[i])
 
 	return pruned
 
@@ -166,7 +169,7 @@ def extract_from_childes(text):
 
 
 '''
-Extract Childes utterances
+Iterate Childes utterances
 
 	inputs: filename is the file to extract from. It is expected that
 			this is a file from the CHILDES database which contains 
@@ -177,44 +180,103 @@ Extract Childes utterances
 				(should be a list of grammatical relations of the form 
 				"node_num|taget_node|GR")
 
-	outputs: returns a list of utterances in the file in order
+	outputs: yields the utterances in the file in order, one at a time
+	description: reads the file line by line, so memory doesn't grow with
+			the size of the file. Only the *(SPEAKER) tier and the %gra tier
+			are kept, every other tier is skipped without being copied.
+			Gives the same speaker, transcription and GR's as 
+			extract_from_childes does on the whole utterance text
 '''
-def extract_childes_utterances(filename):
-	utterance_list = []
+#states of the parser within one utterance
+_TRANSCRIPT, _FIND_GRA, _GRA, _DONE = range(4)
+
+def iter_childes_utterances(filename):
 	with open(filename) as infile:
-		lines = infile.readlines()
-		i = 0
-		found_utterances = False
-		curr_text = ""
-		while ("@End" not in lines[i]):
+		#parts of the current utterance (None until the first utterance)
+		speaker = None
+		for line in infile:
+			if ("@End" in line):
+				break
+			if (line.endswith("\n")):
+				line = line[:-1]
+
+			#new utterance
+			if (line[:1] == "*"):
+				if (speaker is not None):
+					utterance = _finish_childes_utterance(speaker, transcript, gr_text, state)
+					if (utterance is not None):
+						yield utterance
+				state = _TRANSCRIPT
+				gr_text = ""
+				try:
+					speaker = line.split('\t')[0][1:-1]
+					transcript = line.split('\t')[1]
+				#if it's not a well-formed utterance, ignore it
+				except IndexError:
+					speaker = ""
+					state = _DONE
+					transcript = None
+				continue
 			#wait for first utterance
-			if(not found_utterances):
-				if (lines[i][0] == "*"):
-					found_utterances = True
-			if (found_utterances):
-				#new utterance
-				if (lines[i][0] == "*"):
-					#if curr_utterance contains something, extract the 
-					#utterance and start a new one
-					if (curr_text != ""):
-						try:
-							utterance_list.append(ChildesUtterance(curr_text))
-						#if it's not a well-formed utterance, ignore it
-						except:
-							pass
-						curr_text = ""
-
-				#add line to curr_utterance
-				curr_text += lines[i]
-			i += 1
+			if (speaker is None):
+				continue
+
+			#the transcription continues until the first tier
+			if (state == _TRANSCRIPT):
+				if ("%" not in line):
+					transcript += " "
+					transcript += line.strip()
+					continue
+				state = _FIND_GRA
+
+			if (state == _FIND_GRA):
+				if ("%gra" in line):
+					try:
+						#don't append "%gra" to gr_text
+						gr_text += line.split('\t')[1].strip()
+						state = _GRA
+					except IndexError:
+						transcript = None
+						state = _DONE
+			elif (state == _GRA):
+				#make sure that the gr hasn't ended (signified by
+				#another %)
+				if ("%" in line):
+					state = _DONE
+				else:
+					#keep appending the text to gr
+					gr_text += " "
+					gr_text += line.strip()
 
 		#extract last utterance
-		try:
-			utterance_list.append(ChildesUtterance(curr_text))
-		#if it's not a well-formed utterance, ignore it
-		except:
-			pass
-	return utterance_list
+		if (speaker is not None):
+			utterance = _finish_childes_utterance(speaker, transcript, gr_text, state)
+			if (utterance is not None):
+				yield utterance
+
+
+#returns the ChildesUtterance, or None if it's not a well-formed utterance.
+#Malformed tiers are already caught while parsing, so errors raised by
+#extract_verb_construction are real bugs and are not hidden
+def _finish_childes_utterance(speaker, transcript, gr_text, state):
+	#utterances without any tiers are ignored
+	if (state == _TRANSCRIPT or transcript is None):
+		return None
+	#the utterance text ends with an empty line, which continues the gr
+	if (state == _GRA):
+		gr_text += " "
+	return ChildesUtterance.from_parts(speaker, transcript, gr_text)
+
+
+'''
+Extract Childes utterances
+
+	inputs: filename is the file to extract from (see iter_childes_utterances)
+
+	outputs: returns a list of utterances in the file in order
+'''
+def extract_childes_utterances(filename):
+	return list(iter_childes_utterances(filename))
 
 
 '''
@@ -233,20 +295,127 @@ def well_formed(construction):
 
 
 
+'''
+Extract verb construction
+
+	inputs: construction is a string of GR's of the form 
+			"node_num|taget_node|GR"
+	outputs: returns a string of GR's that removes any GR's not related
+			to the construction. Also converts node numbers into generic forms 
+			(ie. "1|2|SUBJ 2|0|ROOT" becomes "n1|x|SUBJ x|0|ROOT"). Returns
+			None if the construction can't be extracted
+'''
+def extract_verb_construction(construction):
+	if (construction is None):
+		return None
+	construction = construction[:-1].split()
+
+	try:
+		construction = prune_graph(construction)
+	except:
+		return None
+
+	#find root
+	root = ""
+	for word in construction:
+		if ("ROOT" in word):
+			root = word
+			break
+	#make sure there is a root
+	if (root == ""):
+		return None
+	
+	else:
+		#map root position to 'x'
+		mappings = {}
+		mappings[int(root.split("|")[0])] = "x"
+		#number nouns, verbs, auxes, and preds starting with 1
+		#increment after using that number
+		nouns = 1
+		verbs = 1
+		auxs = 1
+		preds = 1
+		
+		
+
+		inf = False
+		for i in range(len(construction)):
+			#replace numbers with placeholders
+			curr = construction[i].split("|")
+			
+			for j in range(len(curr)):
+				#subjects and objects
+				if ("SUBJ" in curr[j] or "OBJ" in curr[j]):
+					mappings[int(curr[0])] = "n" + str(nouns)
+					nouns += 1
+
+				#complements
+				if ("COMP" in curr[j] or "XCOMP" in curr[j]):
+					mappings[int(curr[0])] = "v" + str(verbs)
+					verbs += 1
+
+				#infinitives
+				if ("INF" in curr[j]):
+					inf = True
+					mappings[int(curr[0])] = "inf"
+
+				#auxilliaries
+				if ("AUX" in curr[j]):
+					mappings[int(curr[0])] = "aux" 
+					auxs += 1
+
+				#negatives
+				if ("NEG" in curr[j]):
+					curr[0] = "neg"
+
+				#predicates
+				if ("PRED" in curr[j]):
+					mappings[int(curr[0])] = "pred" + str(preds)
+					preds += 1
+			
+		for i in range(len(construction)):
+			curr = construction[i].split("|")			
+			#replace
+			for j in range(len(curr)):
+				if (curr[j].isdigit()):
+					try:
+						curr[j] = mappings[int(curr[j])]
+					except:
+						pass
+			
+			#deal with infinitives
+			if ("INF" in curr):
+				#print(curr)
+				next = construction[i+1].split("|")
+				if (next[1] == "x"):
+					curr[1] = next[0]
+
+			curr = "|".join(curr)
+			construction[i] = curr
+
+		construction = " ".join(construction)
+		return construction
+
+
+
 '''
 Utterance
 
 	Contains data on a generic utterance
 	Constructor takes as input a sentence.
-	The Grammatical Construction is extracted automatically
+	The Grammatical Construction is extracted automatically and the 
+	verb construction is extracted once when the utterance is made
 
-	Contains methods to extract the verb construction from the GR 
-	construction 
+	Uses __slots__ since large corpora contain many utterances
 '''
-class Utterance:
+class Utterance(object):
+	__slots__ = ("text", "construction", "verb_construction", "construction_id")
+
 	def __init__(self, text):
 		self.text = text
 		self.construction = parse_for_GR(text)
+		self.verb_construction = extract_verb_construction(self.construction)
+		self.construction_id = None
 
 	'''
 	Get verb construction
@@ -254,95 +423,36 @@ class Utterance:
 		outputs: returns a string of GR's that removes any GR's not related
 		to the construction. Also converts node numbers into generic forms 
 		(ie. "1|2|SUBJ 2|0|ROOT" becomes "n1|x|SUBJ x|0|ROOT")
+		(see extract_verb_construction)
 	'''
 	def get_verb_construction(self):
-		construction = self.construction[:-1].split()
+		return self.verb_construction
+
+	#__slots__ objects need these to be pickled (for example when they are
+	#sent between processes). construction_id is only valid within one
+	#process, so it is looked up again after unpickling
+	def __getstate__(self):
+		state = {}
+		for cls in type(self).__mro__:
+			for slot in getattr(cls, "__slots__", ()):
+				state[slot] = getattr(self, slot)
+		state["construction_id"] = None
+		return state
+
+	def __setstate__(self, state):
+		for slot, value in state.items():
+			setattr(self, slot, value)
 
-		try:
-			construction = prune_graph(construction)
-		except:
-			return None
-
-		#find root
-		root = ""
-		for word in construction:
-			if ("ROOT" in word):
-				root = word
-				break
-		#make sure there is a root
-		if (root == ""):
-			return None
-		
-		else:
-			#map root position to 'x'
-			mappings = {}
-			mappings[int(root.split("|")[0])] = "x"
-			#number nouns, verbs, auxes, and preds starting with 1
-			#increment after using that number
-			nouns = 1
-			verbs = 1
-			auxs = 1
-			preds = 1
-			
-			
+	'''
+	Get construction id
 
-			inf = False
-			for i in range(len(construction)):
-				#replace numbers with placeholders
-				curr = construction[i].split("|")
-				
-				for j in range(len(curr)):
-					#subjects and objects
-					if ("SUBJ" in curr[j] or "OBJ" in curr[j]):
-						mappings[int(curr[0])] = "n" + str(nouns)
-						nouns += 1
-
-					#complements
-					if ("COMP" in curr[j] or "XCOMP" in curr[j]):
-						mappings[int(curr[0])] = "v" + str(verbs)
-						verbs += 1
-
-					#infinitives
-					if ("INF" in curr[j]):
-						inf = True
-						mappings[int(curr[0])] = "inf"
-
-					#auxilliaries
-					if ("AUX" in curr[j]):
-						mappings[int(curr[0])] = "aux" 
-						auxs += 1
-
-					#negatives
-					if ("NEG" in curr[j]):
-						curr[0] = "neg"
-
-					#predicates
-					if ("PRED" in curr[j]):
-						mappings[int(curr[0])] = "pred" + str(preds)
-						preds += 1
-				
-			for i in range(len(construction)):
-				curr = construction[i].split("|")			
-				#replace
-				for j in range(len(curr)):
-					if (curr[j].isdigit()):
-						try:
-							curr[j] = mappings[int(curr[j])]
-						except:
-							pass
-				
-				#deal with infinitives
-				if ("INF" in curr):
-					#print(curr)
-					next = construction[i+1].split("|")
-					if (next[1] == "x"):
-						curr[1] = next[0]
-
-				curr = "|".join(curr)
-				construction[i] = curr
-
-			construction = " ".join(construction)
-			return construction
+		outputs: returns the id of the verb construction in VOCABULARY, or
+		None if the verb construction is not well formed
+	'''
+	def get_construction_id(self):
+		if (self.construction_id is None and well_formed(self.verb_construction)):
+			self.construction_id = VOCABULARY.intern(self.verb_construction)
+		return self.construction_id
 
 
 
@@ -361,9 +471,37 @@ CHILDES Utterance
 	Inherits from Utterance class
 '''
 class ChildesUtterance(Utterance):
+	__slots__ = ("speaker",)
+
 	def __init__(self, text):
 		#split up text
-		self.speaker, self.text, self.construction = extract_from_childes(text)
+		self.set_parts(*extract_from_childes(text))
+
+	#makes an utterance from an already split up text
+	@classmethod
+	def from_parts(cls, speaker, transcript, construction):
+		utterance = cls.__new__(cls)
+		utterance.set_parts(speaker, transcript, construction)
+		return utterance
+
+	#makes an utterance from a verb construction that has already been 
+	#extracted (see CorpusCache). The transcription and raw GR's are None
+	@classmethod
+	def from_verb_construction(cls, speaker, verb_construction, construction_id=None):
+		utterance = cls.__new__(cls)
+		utterance.speaker = speaker
+		utterance.text = None
+		utterance.construction = None
+		utterance.verb_construction = verb_construction
+		utterance.construction_id = construction_id
+		return utterance
+
+	def set_parts(self, speaker, transcript, construction):
+		self.speaker = speaker
+		self.text = transcript
+		self.construction = construction
+		self.verb_construction = extract_verb_construction(self.construction)
+		self.construction_id = None
 
 	def get_speaker(self):
 		return self.speaker
@@ -384,6 +522,45 @@ class ChildesUtterance(Utterance):
 
 
 
+'''
+Construction vocabulary
+
+	Gives every distinct verb construction a dense integer id, in the 
+	order the constructions are first seen.
+	Learners and experiments work on these ids and only convert back to 
+	strings when writing output
+'''
+class ConstructionVocabulary:
+	def __init__(self):
+		self.ids = {}
+		self.constructions = []
+
+	#returns the id of construction, adding it if it is new
+	def intern(self, construction):
+		try:
+			return self.ids[construction]
+		except KeyError:
+			construction_id = len(self.constructions)
+			self.ids[construction] = construction_id
+			self.constructions.append(construction)
+			return construction_id
+
+	def get_construction(self, construction_id):
+		return self.constructions[construction_id]
+
+	def get_constructions(self, construction_ids):
+		return [self.constructions[construction_id] for construction_id in construction_ids]
+
+	def __contains__(self, construction):
+		return construction in self.ids
+
+	def __len__(self):
+		return len(self.constructions)
+
+#shared by SpeechData, the learners and the experiments
+VOCABULARY = ConstructionVocabulary()
+
+
 '''
 Speech data
 
@@ -395,44 +572,92 @@ Speech data
 class SpeechData:
 	def __init__(self):
 		self.files = []
+		#constructions are stored as ids in VOCABULARY
 		self.constructions_list = []
 		self.child_constructions_list = []
+		self.constructions_set = set()
+		self.child_constructions_set = set()
 		self.utterances_in_order = []
 
 	#add file and update constructions_list
 	def add_file(self, filename):
-		curr_file = ChildesFile(filename)
+		self.add_childes_file(ChildesFile(filename))
+
+	#add an already extracted ChildesFile and update constructions_list
+	def add_childes_file(self, curr_file):
 		self.files.append(curr_file)
 		#add well-formed constructions from file
 		for utterance in curr_file.get_utterances():
-			construction = utterance.get_verb_construction()
-			if (well_formed(construction)):
+			construction = utterance.get_construction_id()
+			if (construction is not None):
 				#add to list of all construction
-				if (construction not in self.constructions_list):
+				if (construction not in self.constructions_set):
+					self.constructions_set.add(construction)
 					self.constructions_list.append(construction)
 				#add to list of child construction
 				if (utterance.get_speaker() == "CHI"):
-					if (construction not in self.child_constructions_list):
+					if (construction not in self.child_constructions_set):
+						self.child_constructions_set.add(construction)
 						self.child_constructions_list.append(construction)
 				self.utterances_in_order.append(utterance)
 
 
+	#add the verb constructions of filename stored in cache (see CorpusCache)
+	def add_cached_file(self, cache, filename):
+		speakers, constructions = cache.get(filename)
+		construction_ids = cache.get_vocabulary_map()[constructions].tolist()
+		speaker_names = cache.get_speakers()
+		for code, construction in zip(speakers.tolist(), construction_ids):
+			speaker = speaker_names[code]
+			if (construction not in self.constructions_set):
+				self.constructions_set.add(construction)
+				self.constructions_list.append(construction)
+			if (speaker == "CHI"):
+				if (construction not in self.child_constructions_set):
+					self.child_constructions_set.add(construction)
+					self.child_constructions_list.append(construction)
+			self.utterances_in_order.append(ChildesUtterance.from_verb_construction(speaker,
+				VOCABULARY.get_construction(construction), construction))
+
 	#will sort the dir before adding
-	def add_from_dir(self, dirname):
+	#processes is the number of worker processes used to extract the 
+	#files (None uses every core). The result is the same for any number
+	#of processes
+	#if use_cache is True, the verb constructions are read from the 
+	#CorpusCache of the directory and only files that changed since the 
+	#last run are extracted again. Utterances read from the cache don't 
+	#have a transcription
+	def add_from_dir(self, dirname, processes=1, use_cache=False):
+		filenames = []
 		files = os.listdir(dirname)
 		files.sort()
 		for filename in files:
 			#ignore files that are not .cha files
 			if (".cha" in filename):
-				print("adding from %s" % filename)
-				self.add_file(str(dirname + "/" + filename))
+				filenames.append(str(dirname + "/" + filename))
+
+		if (not use_cache):
+			for curr_file in load_childes_files(filenames, processes):
+				Helper.log("adding from %s" % os.path.basename(curr_file.get_filename()), Helper.VERBOSE)
+				self.add_childes_file(curr_file)
+			return
+
+		cache = CorpusCache(dirname)
+		changed = [filename for filename in filenames if not cache.is_current(filename)]
+		for curr_file in load_childes_files(changed, processes):
+			Helper.log("compiling %s" % os.path.basename(curr_file.get_filename()), Helper.VERBOSE)
+			cache.put(curr_file)
+		cache.save_index(filenames)
+		for filename in filenames:
+			Helper.log("adding from %s" % os.path.basename(filename), Helper.VERBOSE)
+			self.add_cached_file(cache, filename)
 
 	#get the likelihood within the window [start, end]
 	#inputs: 	start and end are both ints in the range [0, 100] that represent
 	#			the percentage of the constructions to consider.
 	#			For example, [0, 100] is all of the data and [10, 15] breaks the data
 	#			into 20 even pieces and looks only at the 3rd
-	#outpus:	returns a dict of all the constructions with the likelihoods 
+	#outpus:	returns a dict of all the constructions (as ids) with the likelihoods 
 	#			in the given range. Applies add-1 smoothing to the likelihoods
 	def get_construction_likelihoods(self, start=0, end=100):
 		utterances_in_order = self.get_child_produced_in_order()
@@ -447,8 +672,8 @@ class SpeechData:
 		end_idx = int(len(utterances_in_order) * end/100)
 
 		for utterance in utterances_in_order[start_idx:end_idx]:
-			verb_construction = utterance.get_verb_construction()
-			if (verb_construction in self.child_constructions_list):
+			verb_construction = utterance.get_construction_id()
+			if (verb_construction in self.child_constructions_set):
 				construction_counts[verb_construction] += 1
 				total += 1
 
@@ -471,7 +696,7 @@ class SpeechData:
 	def get_child_produced_in_order(self):
 		child_produced = []
 		for utterance in self.utterances_in_order:
-			if (utterance.get_verb_construction() in self.child_constructions_list):
+			if (utterance.get_construction_id() in self.child_constructions_set):
 				child_produced.append(utterance)
 		return child_produced
 
@@ -480,8 +705,168 @@ class SpeechData:
 		self.files = []
 		self.constructions_list = []
 		self.child_constructions_list = []
+		self.constructions_set = set()
+		self.child_constructions_set = set()
 		self.utterances_in_order = []
 
+'''
+Corpus cache
+
+	Compiled on-disk cache of the verb constructions in a directory of
+	CHILDES files, stored in [directory]/.construction_cache/.
+	For every file, the speaker codes and construction ids of its 
+	well-formed utterances are stored as NumPy arrays which are loaded
+	with memory mapping. index.json holds the speaker and construction
+	tables the codes refer to and the modification time and size of 
+	every file when it was compiled, so only files that changed have to
+	be extracted again
+'''
+CACHE_DIRNAME = ".construction_cache"
+#increase when the extraction changes to invalidate old caches
+CACHE_VERSION = 1
+
+class CorpusCache:
+	def __init__(self, dirname):
+		self.cache_dir = os.path.join(dirname, CACHE_DIRNAME)
+		self.index_file = os.path.join(self.cache_dir, "index.json")
+		#constructions and speakers are stored as codes into these tables
+		self.constructions = []
+		self.construction_codes = {}
+		self.speakers = []
+		self.speaker_codes = {}
+		#files[basename] = [mtime, size] when the file was compiled
+		self.files = {}
+		self.vocabulary_map = None
+		self.load_index()
+
+	def load_index(self):
+		if (not os.path.exists(self.index_file)):
+			return
+		with open(self.index_file) as infile:
+			index = json.load(infile)
+		#ignore caches written by a different version
+		if (index.get("version") != CACHE_VERSION):
+			return
+		self.constructions = index["constructions"]
+		self.construction_codes = dict((self.constructions[i], i) for i in range(len(self.constructions)))
+		self.speakers = index["speakers"]
+		self.speaker_codes = dict((self.speakers[i], i) for i in range(len(self.speakers)))
+		self.files = index["files"]
+
+	#only keeps the entries of filenames in the index
+	def save_index(self, filenames):
+		names = set(os.path.basename(filename) for filename in filenames)
+		for name in list(self.files.keys()):
+			if (name not in names):
+				del self.files[name]
+		index = {"version": CACHE_VERSION, "constructions": self.constructions,
+			"speakers": self.speakers, "files": self.files}
+		temp_file = self.index_file + ".tmp"
+		with open(temp_file, "w") as outfile:
+			json.dump(index, outfile)
+		os.rename(temp_file, self.index_file)
+
+	def get_array_files(self, filename):
+		name = os.path.join(self.cache_dir, os.path.basename(filename))
+		return name + ".speakers.npy", name + ".constructions.npy"
+
+	def get_stamp(self, filename):
+		stat = os.stat(filename)
+		return [stat.st_mtime, stat.st_size]
+
+	#returns True if filename hasn't changed since it was compiled
+	def is_current(self, filename):
+		if (self.files.get(os.path.basename(filename)) != self.get_stamp(filename)):
+			return False
+		for array_file in self.get_array_files(filename):
+			if (not os.path.exists(array_file)):
+				return False
+		return True
+
+	#returns the code of value in table, adding it if it is new
+	def get_code(self, table, codes, value):
+		if (value not in codes):
+			codes[value] = len(table)
+			table.append(value)
+		return codes[value]
+
+	#compile curr_file (a ChildesFile) into the cache
+	def put(self, curr_file):
+		if (not os.path.exists(self.cache_dir)):
+			os.makedirs(self.cache_dir)
+		speakers = []
+		constructions = []
+		for utterance in curr_file.get_utterances():
+			construction = utterance.get_verb_construction()
+			if (well_formed(construction)):
+				speakers.append(self.get_code(self.speakers, self.speaker_codes, utterance.get_speaker()))
+				constructions.append(self.get_code(self.constructions, self.construction_codes, construction))
+
+		speakers_file, constructions_file = self.get_array_files(curr_file.get_filename())
+		np.save(speakers_file, np.array(speakers, dtype=np.int32))
+		np.save(constructions_file, np.array(constructions, dtype=np.int32))
+		self.files[os.path.basename(curr_file.get_filename())] = self.get_stamp(curr_file.get_filename())
+		self.vocabulary_map = None
+
+	#returns the (memory mapped) speaker codes and construction codes of
+	#the utterances in filename
+	def get(self, filename):
+		speakers_file, constructions_file = self.get_array_files(filename)
+		return np.load(speakers_file, mmap_mode="r"), np.load(constructions_file, mmap_mode="r")
+
+	def get_speakers(self):
+		return self.speakers
+
+	#returns an array mapping construction codes onto ids in VOCABULARY
+	def get_vocabulary_map(self):
+		if (self.vocabulary_map is None):
+			self.vocabulary_map = np.array([VOCABULARY.intern(construction) 
+				for construction in self.constructions], dtype=np.intp)
+		return self.vocabulary_map
+
+
+'''
+Load distance matrix
+
+	inputs: dirname is the directory of the corpus
+			constructions is a list of construction ids in VOCABULARY 
+				(e.g. SpeechData.get_whole_construction_list())
+			processes is the number of worker processes used to build the
+				matrix (None uses every core)
+			use_cache is a bool. If False, the matrix is built without 
+				reading or writing anything in dirname
+	outputs: returns a Helper.DistanceMatrix with the distances between 
+			all of the constructions. The matrix is saved in 
+			[dirname]/.construction_cache/distances.npz and reused as long
+			as it has every construction, otherwise it is built again 
+			(see Helper.build_distance_matrix)
+'''
+DISTANCES_FILENAME = "distances.npz"
+#increase when the distances change to invalidate old matrices
+DISTANCES_VERSION = 1
+
+def load_distance_matrix(dirname, constructions, processes=1, use_cache=True):
+	filename = os.path.join(dirname, CACHE_DIRNAME, DISTANCES_FILENAME)
+	strings = VOCABULARY.get_constructions(constructions)
+	if (use_cache and os.path.exists(filename)):
+		with np.load(filename) as data:
+			if (int(data["version"]) == DISTANCES_VERSION):
+				stored = data["constructions"].tolist()
+				if (set(strings).issubset(stored)):
+					return Helper.DistanceMatrix([VOCABULARY.intern(construction) for construction in stored], data["distances"])
+
+	strings = sorted(set(strings))
+	distances = Helper.build_distance_matrix(strings, processes)
+	if (not use_cache):
+		return Helper.DistanceMatrix([VOCABULARY.intern(construction) for construction in strings], distances)
+	if (not os.path.exists(os.path.dirname(filename))):
+		os.makedirs(os.path.dirname(filename))
+	temp_file = filename + ".tmp.npz"
+	np.savez(temp_file, version=DISTANCES_VERSION, constructions=np.array(strings), distances=distances)
+	os.rename(temp_file, filename)
+	return Helper.DistanceMatrix([VOCABULARY.intern(construction) for construction in strings], distances)
+
+
 '''
 Childes file
 
@@ -500,4 +885,26 @@ class ChildesFile:
 		return self.filename
 
 
-
+'''
+Load Childes files
+
+	inputs: filenames is a list of CHILDES files
+			processes is the number of worker processes (None uses every 
+				core). If 1, the files are extracted in this process
+	outputs: yields a ChildesFile for every file, in the order of 
+			filenames. Files are extracted in parallel, but always 
+			yielded in order
+'''
+def load_childes_files(filenames, processes=1):
+	if (processes == 1 or len(filenames) <= 1):
+		for filename in filenames:
+			yield ChildesFile(filename)
+		return
+
+	pool = multiprocessing.Pool(processes)
+	try:
+		for curr_file in pool.imap(ChildesFile, filenames):
+			yield curr_file
+	finally:
+		pool.terminate()
+		pool.join()
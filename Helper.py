@@ -1,4 +1,15 @@
 import numpy as np
+import pandas as pd
+import os
+import sys
+import multiprocessing
+import time
+import itertools
+from collections import OrderedDict
+try:
+	import cPickle as pickle
+except ImportError:
+	import pickle
 
 '''
 Get Length complexity
@@ -104,6 +115,450 @@ def modified_levenshtein(key1, key2):
 
 
 
+'''
+Encode construction
+
+	inputs: construction is a string of GR's of the form 
+			"node_num|taget_node|GR"
+	outputs: returns a pair of integer arrays (tokens, grs). tokens[i] 
+			identifies the whole i-th GR and grs[i] identifies only its
+			GR label, so that two GR's can be compared with a single 
+			integer comparison. 
+	description: every distinct GR and GR label is given an integer id 
+			the first time it is seen. The encoding of each construction
+			is cached, so every construction is only split once.
+'''
+_token_ids = {}
+_gr_ids = {}
+_encoded = {}
+
+def encode_construction(construction):
+	try:
+		return _encoded[construction]
+	except KeyError:
+		pass
+
+	words = construction.split()
+	tokens = np.empty(len(words), dtype=np.int32)
+	grs = np.empty(len(words), dtype=np.int32)
+	for i in range(len(words)):
+		gr = words[i].split("|")[2]
+		tokens[i] = _token_ids.setdefault(words[i], len(_token_ids))
+		grs[i] = _gr_ids.setdefault(gr, len(_gr_ids))
+
+	_encoded[construction] = (tokens, grs)
+	return tokens, grs
+
+
+'''
+Wavefront levenshtein
+
+	inputs: query is an encoded construction (see encode_construction)
+			encoded_list is a list of encoded constructions
+			modified is a bool. If True, a swap that doesn't change the
+				GR only counts 0.5 (see modified_levenshtein)
+	outputs: returns a numpy array with the (modified) levenshtein 
+			distance between query and every construction in encoded_list
+	description: the dynamic programming matrices for every construction
+			in encoded_list are stacked into one padded 3-D array of shape
+			(len(encoded_list), len(query) + 1, longest + 1). Every cell on 
+			an anti-diagonal only depends on the two previous anti-diagonals,
+			so each anti-diagonal is filled for all constructions at once.
+			Padding only ever lies below or to the right of the cell that
+			is read out for a construction, so it doesn't change the result.
+'''
+def wavefront_levenshtein(query, encoded_list, modified=True):
+	query_tokens, query_grs = query
+	num = len(encoded_list)
+	lengths = np.array([len(tokens) for tokens, grs in encoded_list], dtype=np.intp)
+	size_x = len(query_tokens) + 1
+	size_y = (lengths.max() if num else 0) + 1
+
+	#pad the known constructions with -1, which never matches a GR
+	tokens = np.full((num, size_y - 1), -1, dtype=np.int32)
+	grs = np.full((num, size_y - 1), -1, dtype=np.int32)
+	for i in range(num):
+		tokens[i, :lengths[i]] = encoded_list[i][0]
+		grs[i, :lengths[i]] = encoded_list[i][1]
+
+	#cost of swapping query[x] with known[y]
+	same_token = query_tokens[None, :, None] == tokens[:, None, :]
+	swap_cost = np.ones(same_token.shape)
+	if (modified):
+		swap_cost[query_grs[None, :, None] == grs[:, None, :]] = .5
+	swap_cost[same_token] = 0
+
+	matrix = np.zeros((num, size_x, size_y))
+	matrix[:, :, 0] = np.arange(size_x)
+	matrix[:, 0, :] = np.arange(size_y)
+
+	for diagonal in range(2, size_x + size_y - 1):
+		x = np.arange(max(1, diagonal - size_y + 1), min(size_x - 1, diagonal - 1) + 1)
+		y = diagonal - x
+		matrix[:, x, y] = np.minimum(np.minimum(matrix[:, x-1, y] + 1, matrix[:, x, y-1] + 1),
+			matrix[:, x-1, y-1] + swap_cost[:, x-1, y-1])
+
+	return matrix[np.arange(num), size_x - 1, lengths]
+
+
+'''
+Bounded levenshtein
+
+	inputs: query, encoded_list and modified are as in wavefront_levenshtein
+			bound is an upper bound on the distances of interest 
+			only_min is a bool. If True, only the smallest distance is 
+				of interest
+	outputs: returns a numpy array with the (modified) levenshtein 
+			distance between query and every construction in encoded_list.
+			Distances over bound are given as np.inf. If only_min, the 
+			smallest distance is exact but others may be np.inf as well
+	description: constructions whose length differs from query by more 
+			than bound are skipped, since every insertion or deletion 
+			costs 1. The matrices of the others are filled one row at a 
+			time for all of them at once: a row is the cheapest of coming
+			from above or from the diagonal, followed by any number of 
+			insertions from the left, which is a running minimum of 
+			row[y] - y. Every path crosses every row, so a construction is
+			dropped as soon as the minimum of its row is over bound. 
+			If only_min, bound is also lowered to the best distance that 
+			can still be reached from the current row (the last cell of 
+			the row plus deleting the rest of query)
+'''
+def bounded_levenshtein(query, encoded_list, bound, modified=True, only_min=False):
+	query_tokens, query_grs = query
+	num = len(encoded_list)
+	size_x = len(query_tokens) + 1
+	distances = np.full(num, np.inf)
+	lengths = np.array([len(tokens) for tokens, grs in encoded_list], dtype=np.intp)
+	candidates = np.flatnonzero(np.abs(lengths - (size_x - 1)) <= bound)
+	if (len(candidates) == 0):
+		return distances
+	lengths = lengths[candidates]
+	size_y = lengths.max() + 1
+
+	#pad the candidates with -1, which never matches a GR
+	tokens = np.full((len(candidates), size_y - 1), -1, dtype=np.int32)
+	grs = np.full((len(candidates), size_y - 1), -1, dtype=np.int32)
+	for i in range(len(candidates)):
+		tokens[i, :lengths[i]] = encoded_list[candidates[i]][0]
+		grs[i, :lengths[i]] = encoded_list[candidates[i]][1]
+
+	#cost of swapping query[x] with candidate[y]
+	same_token = query_tokens[None, :, None] == tokens[:, None, :]
+	swap_cost = np.ones(same_token.shape)
+	if (modified):
+		swap_cost[query_grs[None, :, None] == grs[:, None, :]] = .5
+	swap_cost[same_token] = 0
+
+	columns = np.arange(size_y)
+	#padding is only ever right of the last cell, so it isn't a lower bound
+	padding = columns[None, :] > lengths[:, None]
+	#active[i] is the candidate of row[i]
+	active = np.arange(len(candidates))
+	row = np.tile(columns.astype(float), (len(candidates), 1))
+	for x in range(1, size_x):
+		above = np.empty(row.shape)
+		above[:, 0] = x
+		above[:, 1:] = np.minimum(row[:, 1:] + 1, row[:, :-1] + swap_cost[active, x-1])
+		row = np.minimum.accumulate(above - columns, axis=1) + columns
+
+		if (only_min):
+			last = row[np.arange(len(active)), lengths[active]]
+			bound = min(bound, last.min() + size_x - 1 - x)
+		row_min = np.where(padding[active], np.inf, row).min(axis=1)
+		keep = row_min <= bound
+		if (not keep.all()):
+			active = active[keep]
+			row = row[keep]
+			if (len(active) == 0):
+				return distances
+
+	last = row[np.arange(len(active)), lengths[active]]
+	distances[candidates[active]] = np.where(last <= bound, last, np.inf)
+	return distances
+
+
+'''
+Batch levenshtein
+
+	inputs: construction is a string of GR's of the form 
+			"node_num|taget_node|GR"
+			const_list is a list of constructions
+			modified is a bool (see wavefront_levenshtein)
+			bound and only_min are as in bounded_levenshtein. If neither
+				is given, every distance is computed
+	outputs: returns a numpy array with the distance between construction
+			and every construction in const_list. Gives exactly the same 
+			values as calling levenshtein/modified_levenshtein on every 
+			pair, except for the distances bounded_levenshtein gives as
+			np.inf
+'''
+def batch_levenshtein(construction, const_list, modified=True, bound=None, only_min=False):
+	encoded_list = [encode_construction(key) for key in const_list]
+	if (bound is None and not only_min):
+		return wavefront_levenshtein(encode_construction(construction), encoded_list, modified)
+	if (bound is None):
+		bound = np.inf
+	return bounded_levenshtein(encode_construction(construction), encoded_list, bound, modified, only_min)
+
+
+'''
+Distance cache
+
+	Process-wide memo of modified levenshtein distances between pairs of
+	constructions. Distances are symmetric, so (key1, key2) and 
+	(key2, key1) share one entry. Holds at most max_size distances and 
+	evicts the least recently used one when full. Hits aren't moved to
+	the end of the order when they are looked up, they are only marked 
+	as used, and a used entry that comes up for eviction is moved to the
+	end instead (second chance), so lookups stay cheap for long lists.
+	Keeps count of hits and misses and can be saved to/loaded from disk
+	so that runs on the same corpus can start with a warm cache
+'''
+class DistanceCache:
+	def __init__(self, max_size=1000000):
+		self.max_size = max_size
+		self.distances = OrderedDict()
+		#keys looked up since they were last moved to the end
+		self.used = set()
+		#distances put since the last take_new, None if not tracked
+		self.new = None
+		self.hits = 0
+		self.misses = 0
+
+	def get_key(self, key1, key2):
+		if (key1 <= key2):
+			return (key1, key2)
+		return (key2, key1)
+
+	#returns None if the distance is not cached
+	def get(self, key1, key2):
+		key = self.get_key(key1, key2)
+		distance = self.distances.get(key)
+		if (distance is None):
+			self.misses += 1
+			return None
+		self.used.add(key)
+		self.hits += 1
+		return distance
+
+	#looks up the distance between key and every key in keys in one pass.
+	#Returns an array of the distances (nan if not cached) and the 
+	#indices of the ones that are not cached
+	def get_many(self, key, keys):
+		pairs = [(key, other) if key <= other else (other, key) for other in keys]
+		distances = np.array(map(self.distances.get, pairs), dtype=float)
+		missing = np.flatnonzero(np.isnan(distances))
+		self.used.update(itertools.compress(pairs, ~np.isnan(distances)))
+		self.misses += len(missing)
+		self.hits += len(keys) - len(missing)
+		return distances, missing
+
+	def put(self, key1, key2, distance):
+		key = self.get_key(key1, key2)
+		self.distances.pop(key, None)
+		self.used.discard(key)
+		self.distances[key] = float(distance)
+		if (self.new is not None):
+			self.new.append((key, float(distance)))
+		while (len(self.distances) > self.max_size):
+			key, distance = self.distances.popitem(last=False)
+			#used since it was last moved, give it a second chance
+			if (key in self.used):
+				self.used.discard(key)
+				self.distances[key] = distance
+
+	def save(self, filename):
+		directory = os.path.dirname(filename)
+		if (directory != "" and not os.path.exists(directory)):
+			os.makedirs(directory)
+		with open(filename, "wb") as outfile:
+			pickle.dump(list(self.distances.items()), outfile, pickle.HIGHEST_PROTOCOL)
+
+	#adds the distances stored in filename. Does nothing if the file
+	#doesn't exist
+	def load(self, filename):
+		if (not os.path.exists(filename)):
+			return
+		with open(filename, "rb") as infile:
+			for key, distance in pickle.load(infile):
+				self.put(key[0], key[1], distance)
+
+	#starts keeping the distances that are put, so that a worker process 
+	#can send them back to the main process (see take_new and merge)
+	def track_new(self):
+		self.new = []
+
+	#returns the distances put since the last call and forgets them
+	def take_new(self):
+		new = self.new
+		self.new = []
+		return new
+
+	#adds the distances and the counts of hits and misses of another 
+	#process's cache (see take_new)
+	def merge(self, distances, hits, misses):
+		for key, distance in distances:
+			self.put(key[0], key[1], distance)
+		self.hits += hits
+		self.misses += misses
+
+	def clear(self):
+		self.distances = OrderedDict()
+		self.used = set()
+		if (self.new is not None):
+			self.new = []
+		self.hits = 0
+		self.misses = 0
+
+	def get_hits(self):
+		return self.hits
+
+	def get_misses(self):
+		return self.misses
+
+	def __len__(self):
+		return len(self.distances)
+
+#shared by every learner in the process
+DISTANCE_CACHE = DistanceCache()
+
+
+'''
+Batch modified levenshtein
+
+	same as batch_levenshtein with modified=True, but looks up every 
+	pair in DISTANCE_CACHE first and only computes the missing distances.
+	Cached distances are exact even when over bound. If only_min, the 
+	smallest cached distance is used as a bound for the missing ones.
+	Distances given as np.inf are not cached
+'''
+def batch_modified_levenshtein(construction, const_list, bound=None, only_min=False):
+	distances, missing = DISTANCE_CACHE.get_many(construction, const_list)
+	if (len(missing)):
+		if (only_min and len(missing) < len(const_list)):
+			cached = np.delete(distances, missing).min()
+			bound = cached if bound is None else min(bound, cached)
+		computed = batch_levenshtein(construction, [const_list[i] for i in missing], 
+			bound=bound, only_min=only_min)
+		for i, distance in zip(missing, computed):
+			distances[i] = distance
+			if (distance != np.inf):
+				DISTANCE_CACHE.put(construction, const_list[i], distance)
+	return distances
+
+
+'''
+Distance matrix
+
+	All modified levenshtein distances between a fixed set of 
+	constructions (e.g. the vocabulary of a corpus), so that distance 
+	queries are array indexing.
+	Every use of a distance caps it at 100, and distances are multiples 
+	of .5, so they are stored as uint8 half-units of min(distance, 100)
+	without losing anything. The distances given back are capped at 100
+	inputs: constructions is the list of construction ids of the rows
+			distances is the symmetric uint8 matrix of half-units (see
+				build_distance_matrix)
+	get_distances(construction, constructions) returns the distances 
+	between construction and every construction in constructions (all 
+	ids), or None if one of them isn't in the matrix
+'''
+class DistanceMatrix:
+	def __init__(self, constructions, distances):
+		self.constructions = np.asarray(constructions, dtype=np.intp)
+		self.distances = distances
+		#rows[construction] is the row of construction, -1 if it has none
+		size = self.constructions.max() + 1 if len(self.constructions) else 0
+		self.rows = np.full(size, -1, dtype=np.intp)
+		self.rows[self.constructions] = np.arange(len(self.constructions))
+
+	#returns the rows of constructions, None if one of them is missing
+	def get_rows(self, constructions):
+		constructions = np.asarray(constructions, dtype=np.intp)
+		if (len(constructions) == 0):
+			return constructions
+		if (constructions.max() >= len(self.rows)):
+			return None
+		rows = self.rows[constructions]
+		if ((rows < 0).any()):
+			return None
+		return rows
+
+	def get_distances(self, construction, constructions):
+		if (construction not in self):
+			return None
+		rows = self.get_rows(constructions)
+		if (rows is None):
+			return None
+		return self.distances[self.rows[construction], rows] * .5
+
+	def get_constructions(self):
+		return self.constructions
+
+	def __contains__(self, construction):
+		return 0 <= construction < len(self.rows) and self.rows[construction] >= 0
+
+	def __len__(self):
+		return len(self.constructions)
+
+
+#the distance matrix used by the learners, if any (see set_distance_matrix)
+DISTANCE_MATRIX = None
+
+def set_distance_matrix(matrix):
+	global DISTANCE_MATRIX
+	DISTANCE_MATRIX = matrix
+
+def get_distance_matrix():
+	return DISTANCE_MATRIX
+
+
+'''
+Build distance matrix
+
+	inputs: constructions is a list of constructions (strings of GR's)
+			processes is the number of worker processes (None uses every
+				core). If 1, the matrix is built in this process
+	outputs: returns the symmetric matrix of modified levenshtein 
+			distances between the constructions as uint8 half-units of 
+			min(distance, 100) (see DistanceMatrix). Row i is computed 
+			with one wavefront_levenshtein against the constructions after
+			i, so every pair is only computed once
+'''
+def build_distance_matrix(constructions, processes=1):
+	num = len(constructions)
+	distances = np.zeros((num, num), dtype=np.uint8)
+	if (processes == 1 or num <= 1):
+		_init_distance_worker(constructions)
+		rows = (_get_distance_row(row) for row in range(num))
+	else:
+		pool = multiprocessing.Pool(processes, _init_distance_worker, (constructions,))
+		rows = pool.imap_unordered(_get_distance_row, range(num), chunksize=16)
+	try:
+		for row, half_units in rows:
+			distances[row, row + 1:] = half_units
+			distances[row + 1:, row] = half_units
+	finally:
+		if (processes != 1 and num > 1):
+			pool.terminate()
+			pool.join()
+	return distances
+
+#constructions of the matrix being built, set by _init_distance_worker
+_matrix_constructions = None
+
+def _init_distance_worker(constructions):
+	global _matrix_constructions
+	_matrix_constructions = constructions
+
+def _get_distance_row(row):
+	constructions = _matrix_constructions
+	encoded_list = [encode_construction(construction) for construction in constructions[row + 1:]]
+	distances = wavefront_levenshtein(encode_construction(constructions[row]), encoded_list)
+	return row, (2 * np.minimum(distances, 100)).astype(np.uint8)
+
+
 '''
 Overall levenshtein
 
@@ -118,31 +573,181 @@ Overall levenshtein
 '''
 def overall_levenshtein(construction, const_list):
 	#if const_list is empty, complexity = num of GRs
-	if (const_list == []):
+	if (len(const_list) == 0):
 		return float(len(construction.split()))
 	#otherwise, complexity = lowest levenshtein score 
 	else:
 		#100 is used as an arbitrarily large number
-		result = 100
-		for key in const_list:
-			result = min(result, levenshtein(construction, key))
-		return result
+		return min(100, batch_levenshtein(construction, const_list, modified=False).min())
 
 
 '''
 Overall modified levenshtein
 
 	same as overall_levenshtein, but modified levenshtein distance
-	used instead of regular levenshtein distance
+	used instead of regular levenshtein distance. Only the smallest 
+	distance is needed, so the others are only computed as far as the 
+	best distance found so far (see bounded_levenshtein)
 '''
 def overall_modified_levenshtein(construction, const_list):
 	#if const_list is empty, complexity = num of GRs
-	if (const_list == []):
+	if (len(const_list) == 0):
 		return float(len(construction.split()))
 	#otherwise, complexity = lowest levenshtein score 
 	else:
 		#100 is used as an arbitrarily large number
-		result = 100
-		for key in const_list:
-			result = min(result, modified_levenshtein(construction, key))
-		return result
\ No newline at end of file
+		return min(100, batch_modified_levenshtein(construction, const_list, bound=100, only_min=True).min())
+
+
+'''
+Column buffer
+
+	Collects rows of per-step metrics (one column per name) in a 
+	preallocated array that doubles when it is full, so that a whole
+	trial can be written with a single write_columns call instead of
+	appending to a file at every step
+	inputs: names is the list of column names
+			capacity is the number of rows to preallocate
+			dtype is the type of the values
+'''
+class ColumnBuffer:
+	def __init__(self, names, capacity=1000, dtype=np.float64):
+		self.names = list(names)
+		self.values = np.zeros((max(capacity, 1), len(self.names)), dtype=dtype)
+		self.size = 0
+
+	def add_row(self, row):
+		if (self.size == len(self.values)):
+			grown = np.zeros((2 * len(self.values), len(self.names)), dtype=self.values.dtype)
+			grown[:self.size] = self.values
+			self.values = grown
+		self.values[self.size] = row
+		self.size += 1
+
+	def get_values(self):
+		return self.values[:self.size]
+
+	def write(self, filename, file_format="csv"):
+		write_columns(filename, self.names, self.get_values(), file_format)
+
+	def clear(self):
+		self.size = 0
+
+	def __len__(self):
+		return self.size
+
+
+'''
+Write columns
+
+	inputs: filename is the file to write to
+			names is the list of column names
+			values is a 2-D array with one row per line and one column per
+				name
+			file_format is "csv" or "npz"
+	outputs: writes values in one write. 
+			"csv" writes the layout used by the experiment files: 
+				name1, name2, ...
+				value, value, ...
+			"npz" saves names and values as arrays with np.savez (which 
+				appends ".npz" to filename if it is missing)
+'''
+def write_columns(filename, names, values, file_format="csv"):
+	if (file_format == "npz"):
+		np.savez(filename, names=np.array(names), values=np.asarray(values))
+	elif (file_format == "csv"):
+		lines = ["".join(["%s, " % name for name in names])]
+		if (isinstance(values, np.ndarray)):
+			values = values.tolist()
+		for row in values:
+			lines.append("".join(["%s, " % value for value in row]))
+		with open(filename, "w+") as outfile:
+			outfile.write("\n".join(lines) + "\n")
+	else:
+		raise ValueError("unknown file format '%s'" % file_format)
+
+
+'''
+Read columns
+
+	inputs: filename is a file written by write_columns (a file ending in
+			".npz" is read as npz, anything else as csv)
+	outputs: returns a DataFrame with one column per name. Names are 
+			stripped of whitespace
+'''
+def read_columns(filename):
+	if (filename.endswith(".npz")):
+		with np.load(filename) as data:
+			return pd.DataFrame(data["values"], columns=[str(name) for name in data["names"]])
+	df = pd.read_csv(filename)
+	df = df.drop(labels=" ", axis=1)
+	df.columns = [name.strip() for name in df.columns]
+	return df
+
+
+#verbosity levels. SILENT prints nothing, PROGRESS prints headlines and 
+#throttled progress lines, VERBOSE also prints every file read and 
+#every utterance/step
+SILENT = 0
+PROGRESS = 1
+VERBOSE = 2
+VERBOSITY = PROGRESS
+
+def set_verbosity(level):
+	global VERBOSITY
+	VERBOSITY = level
+
+#True if messages of the given level are printed
+def is_logged(level=PROGRESS):
+	return VERBOSITY >= level
+
+def log(message, level=PROGRESS):
+	if (VERBOSITY >= level):
+		sys.stdout.write("%s\n" % message)
+		sys.stdout.flush()
+
+
+'''
+Progress
+
+	Rate-limited progress line for a loop, e.g. 
+		trials: 12/60 (2.1 trials/s, ETA 23s)
+	update() is cheap and prints at most once every interval seconds, 
+	finish() always prints the final line. Nothing is printed below the
+	given verbosity level
+	inputs: name is the name of the steps
+			total is the number of steps (None if unknown, then no ETA 
+				is shown)
+			interval is the minimum number of seconds between lines
+			level is the verbosity level the progress is printed at
+'''
+class Progress:
+	def __init__(self, name, total=None, interval=1.0, level=PROGRESS):
+		self.name = name
+		self.total = total
+		self.interval = interval
+		self.level = level
+		self.count = 0
+		self.start = time.time()
+		self.last = self.start
+
+	def update(self, steps=1):
+		self.count += steps
+		if (VERBOSITY >= self.level):
+			now = time.time()
+			if (now - self.last >= self.interval):
+				self.last = now
+				log(self.get_line(now), self.level)
+
+	def finish(self):
+		log(self.get_line(time.time()), self.level)
+
+	def get_line(self, now):
+		elapsed = max(now - self.start, 1e-9)
+		rate = self.count / elapsed
+		if (self.total is None):
+			return "%s: %s (%.1f %s/s)" % (self.name, self.count, rate, self.name)
+		line = "%s: %s/%s (%.1f %s/s" % (self.name, self.count, self.total, rate, self.name)
+		if (rate > 0):
+			line += ", ETA %ds" % ((self.total - self.count) / rate)
+		return line + ")"
@@ -1,9 +1,99 @@
 from collections import namedtuple
 from abc import abstractmethod
 import Helper
+import Extract_data
+import numpy as np
 import random
 
 
+'''
+Known constructions
+
+	Stores the constructions a learner knows in the order they were
+	acquired. Membership tests are O(1) and every construction also
+	knows its acquisition position.
+	view() returns a read-only KnownView of the store
+'''
+class KnownConstructions:
+	def __init__(self):
+		self.order = []
+		self.positions = {}
+
+	def add(self, construction):
+		if (construction not in self.positions):
+			self.positions[construction] = len(self.order)
+			self.order.append(construction)
+
+	def get_position(self, construction):
+		return self.positions[construction]
+
+	def view(self):
+		return KnownView(self)
+
+	def __contains__(self, construction):
+		return construction in self.positions
+
+	def __len__(self):
+		return len(self.order)
+
+	def __iter__(self):
+		return iter(self.order)
+
+	def __getitem__(self, index):
+		return self.order[index]
+
+
+'''
+Known view
+
+	Read-only view of a KnownConstructions store. Reflects constructions
+	added to the store after the view was made.
+	Supports indexing in acquisition order and set algebra with any 
+	iterable: view & other and view - other return sets
+'''
+class KnownView:
+	def __init__(self, known):
+		self._known = known
+
+	def get_position(self, construction):
+		return self._known.get_position(construction)
+
+	def intersection(self, other):
+		return set([construction for construction in other if construction in self._known])
+
+	def difference(self, other):
+		other = as_set(other)
+		return set([construction for construction in self._known if construction not in other])
+
+	def __and__(self, other):
+		return self.intersection(other)
+
+	def __sub__(self, other):
+		return self.difference(other)
+
+	def __contains__(self, construction):
+		return construction in self._known
+
+	def __len__(self):
+		return len(self._known)
+
+	def __iter__(self):
+		return iter(self._known)
+
+	def __getitem__(self, index):
+		return self._known[index]
+
+	def __repr__(self):
+		return "KnownView(%r)" % (self._known.order,)
+
+
+#returns other unchanged if it already has O(1) membership tests
+def as_set(other):
+	if (isinstance(other, (set, frozenset, dict, KnownConstructions, KnownView))):
+		return other
+	return set(other)
+
+
 '''
 Learner
 
@@ -13,11 +103,25 @@ Learner
 	Has methods to take in input and determine if a 
 	construction is known, but all other methods
 	are abstract
+	Constructions are given as ids in Extract_data.VOCABULARY.
+	Also keeps the complexity (min modified levenshtein distance to the 
+	known constructions) of every construction it has been asked about.
+	Since known constructions are only ever added, these are updated 
+	with one distance per tracked construction when a construction is 
+	learned instead of being recomputed on every input
+	distance_bound is the largest complexity the learner tells apart 
+	from a complexity of 100 (see get_distance_bound), None if there is
+	none. Distances over it are not computed exactly
 '''
 class Learner:
 	def __init__(self):
 		self.seen_counts = {}
-		self.known_constructions = []
+		self.known_constructions = KnownConstructions()
+		self.known_view = self.known_constructions.view()
+		#min_distances[construction] is the complexity of construction
+		#given the current known constructions
+		self.min_distances = {}
+		self.distance_bound = None
 
 	def take_input(self, construction):
 		#update seen_counts
@@ -28,7 +132,32 @@ class Learner:
 		#check if already known. If not, check if it is now learned
 		if (construction not in self.known_constructions):
 			if (self.learn_construction(construction)):
-				self.known_constructions.append(construction)
+				self.add_known(construction)
+
+	#adds construction to the known constructions and updates the 
+	#complexity of every tracked construction
+	def add_known(self, construction):
+		tracked = list(self.min_distances.keys())
+		if (tracked):
+			distances = get_distances(construction, tracked, self.distance_bound)
+			#the first known construction replaces the default complexity
+			#(number of GRs)
+			if (len(self.known_constructions) == 0):
+				for i in range(len(tracked)):
+					self.min_distances[tracked[i]] = min(100, distances[i])
+			else:
+				for i in range(len(tracked)):
+					self.min_distances[tracked[i]] = min(self.min_distances[tracked[i]], distances[i])
+		self.known_constructions.add(construction)
+
+	#returns Helper.overall_modified_levenshtein(construction, known constructions)
+	def get_complexity(self, construction):
+		try:
+			return self.min_distances[construction]
+		except KeyError:
+			complexity = get_min_distance(construction, self.known_constructions, self.distance_bound)
+			self.min_distances[construction] = complexity
+			return complexity
 
 	def predict_known(self, construction):
 		if (construction in self.known_constructions):
@@ -38,14 +167,35 @@ class Learner:
 
 	def reset(self):
 		self.seen_counts = {}
-		self.known_constructions = []
+		self.known_constructions = KnownConstructions()
+		self.known_view = self.known_constructions.view()
+		self.min_distances = {}
 
+	#returns a read-only view of the known constructions in the order
+	#they were learned
 	def get_known(self):
-		return self.known_constructions
+		return self.known_view
 
 	def get_seen_counts(self):
 		return self.seen_counts
 
+	#returns the object that has to be given input to simulate this
+	#learner (see get_engines)
+	def get_engine(self):
+		return self
+
+	#called when the learner won't be looked at anymore until the next 
+	#reset (e.g. when it knows every construction). A Learner is its own 
+	#engine, so it is retired by not giving it input anymore
+	def retire(self):
+		pass
+
+	#engines that can simulate a whole list of inputs at once without 
+	#being stepped through them do so and return True (see 
+	#FrequentistPopulation.fast_forward). A Learner can't
+	def fast_forward(self, inputs):
+		return False
+
 	@abstractmethod
 	def learn_construction(self, construction):
 		pass
@@ -89,6 +239,8 @@ ComplexityBased Learner
 		-if it is between two complexities that are in the dict, 
 		 	average them
 	 	-if not, assume 0
+	probability_dict is compiled into a lookup table when the learner
+	is made (see compile_lookup_table), so it shouldn't be changed later
 	learn_construction checks the complexity of the given 
 	construction and uses the probability_dict to determine if it 
 	is learned
@@ -97,9 +249,12 @@ class ComplexityBasedLearner(Learner):
 	def __init__(self, probability_dict={1.0: 1.0}):
 		Learner.__init__(self)
 		self.probability_dict = probability_dict
+		#probability_dict compiled into a table indexed by 2 * complexity
+		self.probability_table = compile_lookup_table(probability_dict).tolist()
+		self.distance_bound = get_distance_bound(self.probability_table)
 
 	def learn_construction(self, construction):
-		complexity = Helper.overall_modified_levenshtein(construction, self.known_constructions)
+		complexity = self.get_complexity(construction)
 		probability = self.get_probability(complexity)
 		if (self.check_if_learned(probability)):
 			return True
@@ -108,17 +263,7 @@ class ComplexityBasedLearner(Learner):
 
 	
 	def get_probability(self, complexity):
-		#in probability dict
-		if (complexity in self.probability_dict.keys()):
-			return self.probability_dict[complexity]
-		else:
-			#check if complexity is average of two numbers in probability dict
-			for prob1 in self.probability_dict.keys():
-				for prob2 in self.probability_dict.keys():
-					if (complexity == (prob1 + prob2)/2):
-						return ((self.probability_dict[prob1] + self.probability_dict[prob2])/2)
-			#if it gets here, it is not between two numbers in probability dict
-			return 0
+		return lookup_value(self.probability_table, self.probability_dict, complexity)
 
 	def check_if_learned(self, probability):
 		random_number = random.random()
@@ -144,12 +289,17 @@ Threshold Learner
 	threshold is the value that must be passed.
 	complexity_dict maps complexity onto knowledge. If value is not in 
 	complexity_dict, check if it is the average of 2 values. Otherwise, use 0
+	complexity_dict is compiled into a lookup table when the learner is
+	made (see compile_lookup_table), so it shouldn't be changed later
 '''
 class ThresholdLearner(Learner):
 	def __init__(self, threshold=10, complexity_dict={0.0: 10, 0.5:8, 1.0: 5, 1.5: 3, 2: 1}):
 		Learner.__init__(self)
 		self.threshold = threshold
 		self.complexity_dict = complexity_dict
+		#complexity_dict compiled into a table indexed by 2 * complexity
+		self.progress_table = compile_lookup_table(complexity_dict).tolist()
+		self.distance_bound = get_distance_bound(self.progress_table)
 		#keep track of the progess toward learning each construction
 		self.progress = {}
 
@@ -162,26 +312,16 @@ class ThresholdLearner(Learner):
 		#update progress
 		if (construction not in self.progress.keys()):
 			self.progress[construction] = 0
-		complexity = Helper.overall_modified_levenshtein(construction, self.known_constructions)
+		complexity = self.get_complexity(construction)
 		self.progress[construction] += self.calculate_progress(complexity)
 
 		#check if already known. If not, check if it is now learned
 		if (construction not in self.known_constructions):
 			if (self.learn_construction(construction)):
-				self.known_constructions.append(construction)
+				self.add_known(construction)
 
 	def calculate_progress(self, complexity):
-		#in complexity dict
-		if (complexity in self.complexity_dict.keys()):
-			return self.complexity_dict[complexity]
-		else:
-			#check if complexity is average of two numbers in complexity dict
-			for comp1 in self.complexity_dict.keys():
-				for comp2 in self.complexity_dict.keys():
-					if (complexity == (comp1 + comp2)/2):
-						return ((self.complexity_dict[comp1] + self.complexity_dict[comp2])/2)
-			#if it gets here, it is not between two numbers in complexity dict
-			return 0
+		return lookup_value(self.progress_table, self.complexity_dict, complexity)
 
 
 	def learn_construction(self, construction):
@@ -190,6 +330,10 @@ class ThresholdLearner(Learner):
 		else:
 			return False
 
+	def reset(self):
+		Learner.reset(self)
+		self.progress = {}
+
 	def get_progress(self):
 		return self.progress
 
@@ -205,6 +349,476 @@ class ThresholdLearner(Learner):
 
 
 
+'''
+Find value
+
+	inputs: value_dict maps complexities onto values (for example a 
+			probability_dict or a complexity_dict)
+			complexity is the complexity to find the value of
+	outputs: returns value_dict[complexity] if it is in value_dict. If not,
+			if complexity is the average of two complexities in value_dict, 
+			returns the average of their values. Otherwise returns 0
+'''
+def find_value(value_dict, complexity):
+	#in value dict
+	if (complexity in value_dict.keys()):
+		return value_dict[complexity]
+	else:
+		#check if complexity is average of two numbers in value dict
+		for comp1 in value_dict.keys():
+			for comp2 in value_dict.keys():
+				if (complexity == (comp1 + comp2)/2):
+					return ((value_dict[comp1] + value_dict[comp2])/2)
+		#if it gets here, it is not between two numbers in value dict
+		return 0
+
+
+'''
+Compile lookup table
+
+	inputs: value_dict maps complexities onto values (see find_value)
+	outputs: returns an array with table[2 * complexity] = 
+			find_value(value_dict, complexity) for every multiple of 0.5 
+			from 0 to MAX_COMPLEXITY. Modified levenshtein distances are
+			always multiples of 0.5 and overall_modified_levenshtein never
+			returns more than 100 once something is known
+'''
+MAX_COMPLEXITY = 100
+
+def compile_lookup_table(value_dict):
+	return np.array([find_value(value_dict, i / 2.0) for i in range(2 * MAX_COMPLEXITY + 1)], dtype=float)
+
+
+'''
+Lookup value
+
+	inputs: table is value_dict compiled by compile_lookup_table
+			value_dict maps complexities onto values
+			complexity is the complexity to find the value of
+	outputs: returns find_value(value_dict, complexity) in O(1) time.
+			Only falls back to find_value for complexities that are not
+			in the table
+'''
+def lookup_value(table, value_dict, complexity):
+	index = complexity * 2
+	if (0 <= index < len(table) and index == int(index)):
+		return table[int(index)]
+	return find_value(value_dict, complexity)
+
 
+'''
+Get distance bound
 
+	inputs: table is a value_dict compiled by compile_lookup_table
+	outputs: returns the largest complexity with a nonzero value in 
+			table, or None if that is MAX_COMPLEXITY. Every complexity 
+			over it has a value of 0, the same as a complexity of 100, 
+			so distances over it don't have to be computed exactly
+'''
+def get_distance_bound(table):
+	nonzero = np.flatnonzero(table)
+	if (len(nonzero) == 0):
+		return 0.0
+	if (nonzero[-1] == 2 * MAX_COMPLEXITY):
+		return None
+	return nonzero[-1] / 2.0
+
+
+'''
+Get distances
+
+	inputs: construction is a construction id in Extract_data.VOCABULARY
+			constructions is a list of construction ids
+			bound and only_min are as in Helper.bounded_levenshtein
+	outputs: returns an array with the modified levenshtein distance 
+			between construction and every construction in constructions.
+			Uses Helper.DISTANCE_MATRIX if it has all of them (distances 
+			are then capped at 100, which every use of them does anyway)
+			and Helper.batch_modified_levenshtein otherwise, in which case
+			distances over bound (if given) may be np.inf. If only_min, 
+			only the smallest distance has to be exact
+'''
+def get_distances(construction, constructions, bound=None, only_min=False):
+	matrix = Helper.DISTANCE_MATRIX
+	if (matrix is not None):
+		distances = matrix.get_distances(construction, list(constructions))
+		if (distances is not None):
+			return distances
+	vocabulary = Extract_data.VOCABULARY
+	return Helper.batch_modified_levenshtein(vocabulary.get_construction(construction),
+		vocabulary.get_constructions(constructions), bound, only_min)
+
+#same as Helper.overall_modified_levenshtein for ids (see get_distances).
+#If the distance is over bound, may return 100 instead
+def get_min_distance(construction, constructions, bound=None):
+	if (len(constructions) == 0):
+		return float(len(Extract_data.VOCABULARY.get_construction(construction).split()))
+	return min(100, get_distances(construction, constructions, bound, only_min=True).min())
 
+
+'''
+Get engines
+
+	inputs: learners is a dict of named learners (Learner objects or 
+			members of a population)
+	outputs: returns the list of distinct engines that have to be given
+			input (take_input) and be reset (reset) to simulate every 
+			learner in learners. A Learner is its own engine and all 
+			members of a population share the population as their engine.
+			Engines are in the order they first appear in the sorted names
+			of learners, so the order doesn't depend on the dict
+'''
+def get_engines(learners):
+	engines = []
+	seen = set()
+	for learner in sorted(learners):
+		engine = learners[learner].get_engine()
+		if (id(engine) not in seen):
+			seen.add(id(engine))
+			engines.append(engine)
+	return engines
+
+
+'''
+Population member
+
+	Learner-like view of one member of a population. Has the same 
+	methods to look at the known constructions as a Learner, but input
+	has to be given to the population (see get_engine)
+'''
+class PopulationMember:
+	def __init__(self, population, index):
+		self.population = population
+		self.index = index
+
+	def predict_known(self, construction):
+		return construction in self.population.get_known(self.index)
+
+	def get_known(self):
+		return self.population.get_known(self.index)
+
+	def get_engine(self):
+		return self.population
+
+	#the population stops simulating the member until it is reset. The
+	#member keeps the state it had when it was retired
+	def retire(self):
+		self.population.retire(self.index)
+
+
+'''
+Frequentist Population
+
+	Simulates a group of FrequentistLearners that only differ in 
+	learn_times. The seen count of every construction is shared by all
+	members and the learn_times are kept in a sorted array, so each input
+	costs one count update and a binary search for the members that 
+	learn the construction at exactly this count, no matter how many
+	members there are.
+	learn_times_list is a list of learn_times, one per member.
+	get_members() returns a FrequentistMember for every member
+'''
+class FrequentistPopulation:
+	def __init__(self, learn_times_list):
+		self.learn_times = np.array([int(learn_times) for learn_times in learn_times_list], dtype=np.int64)
+		#a construction is learned when its count reaches the threshold.
+		#counts start at 1, so learn_times below 1 learn on the first input
+		thresholds = np.maximum(self.learn_times, 1)
+		self.all_member_order = np.argsort(thresholds, kind="mergesort")
+		self.all_sorted_thresholds = thresholds[self.all_member_order]
+		self.members = [FrequentistMember(self, i) for i in range(len(self.learn_times))]
+		self.reset()
+
+	def take_input(self, construction):
+		self.steps += 1
+		if (construction >= len(self.seen_counts)):
+			self.seen_counts = np.concatenate([self.seen_counts,
+				np.zeros(max(construction + 1, 2 * len(self.seen_counts)) - len(self.seen_counts), dtype=np.int64)])
+		self.seen_counts[construction] += 1
+		count = self.seen_counts[construction]
+
+		#members whose threshold is exactly count learn the construction now
+		start = np.searchsorted(self.sorted_thresholds, count, side="left")
+		end = np.searchsorted(self.sorted_thresholds, count, side="right")
+		for member in self.member_order[start:end]:
+			self.known[member].add(construction)
+			self.acquisition_steps[member][construction] = self.steps
+
+	def reset(self):
+		#members that aren't retired (see retire), sorted by threshold
+		self.member_order = self.all_member_order
+		self.sorted_thresholds = self.all_sorted_thresholds
+		self.seen_counts = np.zeros(0, dtype=np.int64)
+		#number of inputs so far
+		self.steps = 0
+		self.known = [KnownConstructions() for member in self.members]
+		self.known_views = [known.view() for known in self.known]
+		#acquisition_steps[member][construction] is the input number at 
+		#which member learned construction
+		self.acquisition_steps = [{} for member in self.members]
+
+	def get_known(self, member):
+		return self.known_views[member]
+
+	def get_acquisition_steps(self, member):
+		return self.acquisition_steps[member]
+
+	'''
+	simulates the given inputs at once. The result is the same as calling
+	take_input with every input in order: a member with learn_times k 
+	learns a construction at its k-th occurrence, so only the occurrence
+	number of every input has to be counted (with the counts so far) 
+	and looked up in the sorted thresholds
+	'''
+	def fast_forward(self, inputs):
+		inputs = np.asarray(inputs, dtype=np.int64)
+		if (len(inputs) == 0):
+			return True
+		if (inputs.max() >= len(self.seen_counts)):
+			self.seen_counts = np.concatenate([self.seen_counts,
+				np.zeros(inputs.max() + 1 - len(self.seen_counts), dtype=np.int64)])
+
+		#occurrences[i] is the seen count of inputs[i] after input i
+		order = np.argsort(inputs, kind="mergesort")
+		sorted_inputs = inputs[order]
+		starts = np.flatnonzero(np.concatenate([[True], sorted_inputs[1:] != sorted_inputs[:-1]]))
+		group_starts = np.repeat(starts, np.diff(np.concatenate([starts, [len(inputs)]])))
+		occurrences = np.empty(len(inputs), dtype=np.int64)
+		occurrences[order] = np.arange(len(inputs)) - group_starts + 1
+		occurrences += self.seen_counts[inputs]
+
+		#members whose threshold is exactly the count learn the input then
+		start = np.searchsorted(self.sorted_thresholds, occurrences, side="left")
+		end = np.searchsorted(self.sorted_thresholds, occurrences, side="right")
+		for i in np.flatnonzero(end > start):
+			construction = int(inputs[i])
+			for member in self.member_order[start[i]:end[i]]:
+				self.known[member].add(construction)
+				self.acquisition_steps[member][construction] = self.steps + i + 1
+
+		self.seen_counts += np.bincount(inputs, minlength=len(self.seen_counts))
+		self.steps += len(inputs)
+		return True
+
+	#stops simulating member until the next reset
+	def retire(self, member):
+		keep = self.member_order != member
+		self.member_order = self.member_order[keep]
+		self.sorted_thresholds = self.sorted_thresholds[keep]
+
+	def get_seen_counts(self):
+		return dict((int(construction), int(self.seen_counts[construction]))
+			for construction in np.flatnonzero(self.seen_counts))
+
+	def get_members(self):
+		return self.members
+
+	def get_learn_times(self, member):
+		return int(self.learn_times[member])
+
+
+'''
+Frequentist Member
+
+	A member of a FrequentistPopulation. Behaves like a
+	FrequentistLearner with the member's learn_times
+'''
+class FrequentistMember(PopulationMember):
+	def get_seen_counts(self):
+		return self.population.get_seen_counts()
+
+	def get_acquisition_steps(self):
+		return self.population.get_acquisition_steps(self.index)
+
+	def get_type(self):
+		return "frequentist"
+
+	def get_learn_times(self):
+		return self.population.get_learn_times(self.index)
+
+
+'''
+Threshold Population
+
+	Simulates a group of ThresholdLearners that only differ in threshold 
+	and complexity_dict. State is kept in (members x constructions) 
+	arrays, so each input is applied to every member in one vectorized 
+	update:
+		-progress[m, c] is the progress of member m toward learning c
+		-min_distances[m, c] is the complexity of c for member m (see
+			Learner.get_complexity)
+		-tables[m] is the compiled complexity_dict of member m (see 
+			compile_lookup_table), so progress increments are one lookup
+	Distances between the constructions seen so far are kept in one
+	matrix that is shared by all members. They are only computed exactly
+	up to the largest distance_bound of the members (see Learner).
+	configs is a list of (threshold, complexity_dict), one per member.
+	get_members() returns a ThresholdMember for every member
+'''
+class ThresholdPopulation:
+	def __init__(self, configs):
+		self.threshold_values = [threshold for threshold, complexity_dict in configs]
+		self.thresholds = np.array([float(threshold) for threshold in self.threshold_values])
+		self.complexity_dicts = [complexity_dict for threshold, complexity_dict in configs]
+		self.tables = np.array([compile_lookup_table(complexity_dict) for complexity_dict in self.complexity_dicts])
+		bounds = [get_distance_bound(table) for table in self.tables]
+		self.distance_bound = None if None in bounds else max(bounds)
+		self.members = [ThresholdMember(self, i) for i in range(len(configs))]
+		self.reset()
+
+	def take_input(self, construction):
+		column = self.get_column(construction)
+		self.seen_counts[column] += 1
+
+		#update progress of the members that aren't retired
+		members = self.active
+		complexities = self.min_distances[members, column]
+		progress = self.progress[members, column] + self.calculate_progress(complexities, members)
+		self.progress[members, column] = progress
+
+		#check if already known. If not, check if it is now learned
+		learned = (~self.known_mask[members, column]) & (progress >= self.thresholds[members])
+		for member in members[learned]:
+			self.add_known(member, column)
+
+	#returns the progress of the given members (all members if None) for 
+	#the given complexities (one per member)
+	def calculate_progress(self, complexities, members=None):
+		if (members is None):
+			members = self.member_indices
+		indices = complexities * 2
+		if (len(indices) == 0 or indices.max() <= 2 * MAX_COMPLEXITY):
+			return self.tables[members, indices.astype(np.intp)]
+		return np.array([find_value(self.complexity_dicts[members[i]], complexities[i])
+			for i in range(len(members))], dtype=float)
+
+	#stops simulating member until the next reset
+	def retire(self, member):
+		self.active = self.active[self.active != member]
+
+	#every input changes the distances, so the population has to be 
+	#stepped through the inputs
+	def fast_forward(self, inputs):
+		return False
+
+	def add_known(self, member, column):
+		num = len(self.constructions)
+		distances = self.distances[column, :num]
+		#the first known construction replaces the default complexity
+		#(number of GRs)
+		if (self.num_known[member] == 0):
+			self.min_distances[member, :num] = np.minimum(100, distances)
+		else:
+			self.min_distances[member, :num] = np.minimum(self.min_distances[member, :num], distances)
+		self.known_mask[member, column] = True
+		self.num_known[member] += 1
+		self.known[member].add(self.constructions[column])
+
+	#returns the column of construction, adding a column if it hasn't been
+	#seen before
+	def get_column(self, construction):
+		try:
+			return self.columns[construction]
+		except KeyError:
+			pass
+
+		column = len(self.constructions)
+		if (column == self.capacity):
+			self.grow()
+		vocabulary = Extract_data.VOCABULARY
+		string = vocabulary.get_construction(construction)
+		distances = get_distances(construction, self.constructions, self.distance_bound)
+		self.distances[column, :column] = distances
+		self.distances[:column, column] = distances
+		self.distances[column, column] = 0
+
+		#complexity given the constructions every member knows so far
+		if (column > 0):
+			known_distances = np.where(self.known_mask[:, :column], distances[None, :], np.inf).min(axis=1)
+		else:
+			known_distances = np.full(len(self.members), np.inf)
+		self.min_distances[:, column] = np.where(self.num_known == 0, 
+			float(len(string.split())), np.minimum(100, known_distances))
+
+		self.columns[construction] = column
+		self.constructions.append(construction)
+		return column
+
+	#doubles the number of columns that can be stored
+	def grow(self):
+		old = self.capacity
+		self.capacity = max(16, 2 * old)
+		num_members = len(self.members)
+
+		distances = np.zeros((self.capacity, self.capacity))
+		distances[:old, :old] = self.distances
+		self.distances = distances
+		for name in ["progress", "min_distances", "known_mask"]:
+			curr = getattr(self, name)
+			grown = np.zeros((num_members, self.capacity), dtype=curr.dtype)
+			grown[:, :old] = curr
+			setattr(self, name, grown)
+		seen_counts = np.zeros(self.capacity, dtype=np.int64)
+		seen_counts[:old] = self.seen_counts
+		self.seen_counts = seen_counts
+
+	def reset(self):
+		num_members = len(self.members)
+		self.member_indices = np.arange(num_members)
+		#members that aren't retired (see retire)
+		self.active = self.member_indices
+		#constructions[column] is the construction id of a column
+		self.constructions = []
+		self.columns = {}
+		self.capacity = 0
+		self.distances = np.zeros((0, 0))
+		self.progress = np.zeros((num_members, 0))
+		self.min_distances = np.zeros((num_members, 0))
+		self.known_mask = np.zeros((num_members, 0), dtype=bool)
+		self.seen_counts = np.zeros(0, dtype=np.int64)
+		self.num_known = np.zeros(num_members, dtype=np.int64)
+		self.known = [KnownConstructions() for member in self.members]
+		self.known_views = [known.view() for known in self.known]
+
+	def get_known(self, member):
+		return self.known_views[member]
+
+	def get_progress(self, member):
+		return dict((self.constructions[column], self.progress[member, column])
+			for column in range(len(self.constructions)))
+
+	def get_seen_counts(self):
+		return dict((self.constructions[column], int(self.seen_counts[column]))
+			for column in range(len(self.constructions)))
+
+	def get_members(self):
+		return self.members
+
+	def get_threshold(self, member):
+		return self.threshold_values[member]
+
+	def get_complexity_dict(self, member):
+		return self.complexity_dicts[member]
+
+
+'''
+Threshold Member
+
+	A member of a ThresholdPopulation. Behaves like a ThresholdLearner
+	with the member's threshold and complexity_dict
+'''
+class ThresholdMember(PopulationMember):
+	def get_seen_counts(self):
+		return self.population.get_seen_counts()
+
+	def get_progress(self):
+		return self.population.get_progress(self.index)
+
+	def get_type(self):
+		return "threshold"
+
+	def get_threshold(self):
+		return self.population.get_threshold(self.index)
+
+	def get_complexity_dict(self):
+		return self.population.get_complexity_dict(self.index)
@@ -0,0 +1,336 @@
+'''
+This file contains the sweep subsystem, which builds the learners of an
+experiment from a declarative spec instead of one hand-written line per
+learner.
+
+A spec is a dict (or a json file, see load_spec) of the form
+	{
+		"seeds": [master seeds to run the experiment with],
+		"learners": [entry, entry, ...]
+	}
+where every entry describes a grid of learners of one type:
+	{
+		"type": "threshold",
+		"name": "Threshold_%(complexity_dict)s",
+		"threshold": [10],
+		"complexity_dict": [["10_8_1", {0.5: 10, 1.0: 8}], ...]
+	}
+type is the get_type() of the learners ("frequentist", "ComplexityBased"
+or "threshold") and every other key is a parameter of the learner. A
+parameter given as a list is an axis of the grid, every combination of
+the axes is one learner. Only the parameters in PARAMS can be given.
+A value of an axis can be labeled by giving it as a [label, value] pair,
+the label is then used for it in the name. name is formatted with the 
+labels of the parameters. Unlabeled values get a label from their value
+(see get_label). Names end up as column headers, so they can't contain
+a comma.
+
+Deterministic learners (see DETERMINISTIC_TYPES) with the same type and
+parameters are only simulated once, the names of the duplicates refer to
+the same learner. Learners that can share their work are simulated 
+together by the engine of their type (see ENGINES).
+'''
+
+
+import Learner
+import Helper
+import json
+import itertools
+from collections import namedtuple
+
+
+'''
+Learner config
+
+	name is the name of the learner in the output files
+	learner_type is the get_type() of the learner
+	params is a dict of the parameters of the learner
+'''
+LearnerConfig = namedtuple("LearnerConfig", ["name", "learner_type", "params"])
+
+
+##################################################################
+#
+#				ENGINES
+#
+##################################################################
+'''
+Engine functions
+
+	inputs: configs is a list of LearnerConfigs of one type
+	outputs: returns a list of learners (Learner objects or population
+			members), one for each config
+'''
+#frequentist learners share one count per construction
+def build_frequentist(configs):
+	population = Learner.FrequentistPopulation([config.params.get("learn_times", 10) for config in configs])
+	return population.get_members()
+
+#complexity-based learners draw their own random numbers, so every config
+#is its own Learner
+def build_complexity_based(configs):
+	return [Learner.ComplexityBasedLearner(**config.params) for config in configs]
+
+#threshold learners share the distances between constructions and are
+#updated with (learners x constructions) arrays
+def build_threshold(configs):
+	population = Learner.ThresholdPopulation([(config.params.get("threshold", 10), config.params.get("complexity_dict", {0.0: 10, 0.5:8, 1.0: 5, 1.5: 3, 2: 1})) for config in configs])
+	return population.get_members()
+
+#maps every learner type to the fastest way to simulate a group of them
+ENGINES = {
+	"frequentist": build_frequentist,
+	"ComplexityBased": build_complexity_based,
+	"threshold": build_threshold,
+}
+
+#the parameters that can be given for every learner type
+PARAMS = {
+	"frequentist": ["learn_times"],
+	"ComplexityBased": ["probability_dict"],
+	"threshold": ["threshold", "complexity_dict"],
+}
+
+#learner types that don't draw random numbers. Duplicates of these give
+#the same results, so they are simulated once. Duplicates of other types
+#are separate learners, since sharing one would correlate their results
+DETERMINISTIC_TYPES = ["frequentist", "threshold"]
+
+#parameters that are tables of values by complexity. json only has string
+#keys, so their keys are converted to floats
+TABLE_PARAMS = ["probability_dict", "complexity_dict"]
+
+
+##################################################################
+#
+#				SWEEP
+#
+##################################################################
+'''
+Sweep
+
+	Expands a spec (see the top of this file) into a list of learner
+	configs.
+	get_configs() returns the LearnerConfigs in the order of the spec 
+	without duplicates of deterministic learners, get_aliases() maps the
+	name of every dropped duplicate to the name of the config it 
+	duplicates
+	build() returns a dict of named learners for the experiments. Every
+	call builds new learners
+	get_seeds(default) returns the seeds of the spec, or [default] if the
+	spec has none
+'''
+class Sweep:
+	def __init__(self, spec):
+		self.seeds = list(spec.get("seeds", []))
+		self.configs = []
+		self.aliases = {}
+		#maps the type and parameters of every config to its name
+		names = {}
+		used_names = set()
+		for entry in spec["learners"]:
+			for config in expand_entry(entry):
+				if (config.name in used_names):
+					raise ValueError("learner name '%s' is used twice" % config.name)
+				if ("," in config.name):
+					raise ValueError("learner name '%s' contains a comma" % config.name)
+				used_names.add(config.name)
+				key = get_config_key(config)
+				if (key in names and config.learner_type in DETERMINISTIC_TYPES):
+					self.aliases[config.name] = names[key]
+				else:
+					names[key] = config.name
+					self.configs.append(config)
+
+	def get_configs(self):
+		return self.configs
+
+	def get_aliases(self):
+		return self.aliases
+
+	def get_seeds(self, default=None):
+		if (len(self.seeds) == 0):
+			return [default]
+		return self.seeds
+
+	def build(self):
+		if (len(self.aliases) > 0):
+			Helper.log("dropped %s duplicate learners" % len(self.aliases))
+		groups = {}
+		for config in self.configs:
+			groups.setdefault(config.learner_type, []).append(config)
+		learners = {}
+		for learner_type in sorted(groups):
+			configs = groups[learner_type]
+			built = ENGINES[learner_type](configs)
+			for i in range(len(configs)):
+				learners[configs[i].name] = built[i]
+		for alias in self.aliases:
+			learners[alias] = learners[self.aliases[alias]]
+		return learners
+
+
+'''
+Expand entry
+
+	inputs: entry is one learner entry of a spec
+	outputs: returns a list with a LearnerConfig for every point of the
+			grid of the entry. Raises a ValueError if the type or a 
+			parameter is unknown
+'''
+def expand_entry(entry):
+	learner_type = entry["type"]
+	if (learner_type not in PARAMS):
+		raise ValueError("unknown learner type '%s'" % learner_type)
+	keys = sorted([key for key in entry if key not in ["type", "name"]])
+	for key in keys:
+		if (key not in PARAMS[learner_type]):
+			raise ValueError("unknown parameter '%s' for learner type '%s'" % (key, learner_type))
+	#by default the name has the labels of all parameters
+	name_format = entry.get("name", "_".join([learner_type] + ["%%(%s)s" % key for key in keys]))
+	axes = []
+	for key in keys:
+		values = entry[key]
+		if (not isinstance(values, list)):
+			values = [values]
+		axes.append([get_labeled_value(key, value) for value in values])
+	configs = []
+	for point in itertools.product(*axes):
+		labels = {}
+		params = {}
+		for i in range(len(keys)):
+			labels[keys[i]], params[keys[i]] = point[i]
+		configs.append(LearnerConfig(name_format % labels, learner_type, params))
+	return configs
+
+
+#returns (label, value) for a value of a parameter axis
+def get_labeled_value(key, value):
+	if (isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[0], basestring)):
+		label, value = value
+	else:
+		label = None
+	if (key in TABLE_PARAMS):
+		value = dict([(float(complexity), value[complexity]) for complexity in value])
+	if (label is None):
+		label = get_label(value)
+	return label, value
+
+
+#returns a label for an unlabeled value that is safe to use in a column
+#header. Tables become "complexity-value" pairs joined by "_", for 
+#example {0.5: 10, 1.0: 3} becomes "0.5-10_1.0-3"
+def get_label(value):
+	if (isinstance(value, dict)):
+		return "_".join(["%s-%s" % (complexity, value[complexity]) for complexity in sorted(value)])
+	return str(value)
+
+
+#hashable key of the type and parameters of a config. Tables become
+#sorted tuples, so equal tables give equal keys
+def get_config_key(config):
+	params = []
+	for key in sorted(config.params):
+		value = config.params[key]
+		if (isinstance(value, dict)):
+			value = tuple(sorted(value.items()))
+		params.append((key, value))
+	return (config.learner_type, tuple(params))
+
+
+'''
+Load spec
+
+	inputs: filename is a json file with a spec
+	outputs: returns the Sweep of the spec
+'''
+def load_spec(filename):
+	with open(filename) as infile:
+		return Sweep(json.load(infile))
+
+
+#the learners that were hand-written in both experiments
+DEFAULT_SPEC = {
+	"learners": [
+		{
+			"type": "frequentist",
+			"name": "frequentist_%(learn_times)s",
+			"learn_times": [1, 2, 3, 5, 10, 15],
+		},
+		{
+			"type": "ComplexityBased",
+			"name": "ComplexityBased_%(probability_dict)s",
+			"probability_dict": [
+				("1", {0.5: 1, 1.0:1}),
+				("09_1", {0.5: 1, 1.0:0.9}),
+				("09_2", {0.5: 1, 1.0:0.9, 2.0:0.8}),
+				("09_3", {0.5: 1, 1.0:0.9, 2.0:0.7}),
+				("09_4", {0.5: 1, 1.0:0.9, 2.0:0.6}),
+				("09_5", {0.5: 1, 1.0:0.9, 2.0:0.5}),
+				("09_6", {0.5: 1, 1.0:0.9, 2.0:0.4}),
+				("09_7", {0.5: 1, 1.0:0.9, 2.0:0.4, 3.0:0.2}),
+				("09_8", {0.5: 1, 1.0:0.9, 2.0:0.4, 2.5: 0.2, 3.0:0.1}),
+				("09_9", {0.5: 1, 1.0:0.9, 2.0:0.4, 2.5: 0.1, 3.0:0.05}),
+				("08_1", {0.5: 1, 1.0:0.8}),
+				("08_2", {0.5: 1, 1.0:0.8, 2.0:0.7}),
+				("08_3", {0.5: 1, 1.0:0.8, 2.0:0.6}),
+				("08_4", {0.5: 1, 1.0:0.8, 2.0:0.5}),
+				("08_5", {0.5: 1, 1.0:0.8, 2.0:0.4}),
+				("08_6", {0.5: 1, 1.0:0.8, 2.0:0.4, 3.0:0.2}),
+				("08_7", {0.5: 1, 1.0:0.8, 2.0:0.4, 2.5: 0.2, 3.0:0.1}),
+				("08_8", {0.5: 1, 1.0:0.8, 2.0:0.4, 2.5: 0.1, 3.0:0.05}),
+				("07_1", {0.5: 1, 1.0:0.7}),
+				("07_2", {0.5: 1, 1.0:0.7, 2.0:0.6}),
+				("07_3", {0.5: 1, 1.0:0.7, 2.0:0.5}),
+				("07_4", {0.5: 1, 1.0:0.7, 2.0:0.4}),
+				("07_5", {0.5: 1, 1.0:0.7, 2.0:0.4, 3.0:0.2}),
+				("07_6", {0.5: 1, 1.0:0.7, 2.0:0.4, 2.5: 0.2, 3.0:0.1}),
+				("07_7", {0.5: 1, 1.0:0.7, 2.0:0.4, 2.5: 0.1, 3.0:0.05}),
+			],
+		},
+		{
+			"type": "threshold",
+			"name": "Threshold_%(complexity_dict)s",
+			"threshold": 10,
+			"complexity_dict": [
+				("10_10", {0.5: 10, 1.0:10}),
+				("10_8_1", {0.5: 10, 1.0:8}),
+				("10_8_2", {0.5: 10, 1.0:8, 1.5:7, 2.0:6}),
+				("10_8_", {0.5: 10, 1.0:8, 1.5:7, 2.0:6, 3.0:4}),
+				("10_8_3", {0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4, 3.0: 2}),
+				("10_8_4", {0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4, 3.0: 2}),
+				("10_8_5", {0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4, 3.0: 1}),
+				("10_8_6", {0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4}),
+				("10_8_7", {0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 3, 3.0: 2}),
+				("10_8_8", {0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 3, 3.0: 1}),
+				("10_8_9", {0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 3}),
+				("10_8_10", {0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 1}),
+				("10_6_1", {0.5: 10, 1.0:6}),
+				("10_6_2", {0.5: 10, 1.0:6, 1.5: 5, 2.0: 4}),
+				("10_6_3", {0.5: 10, 1.0:6, 1.5: 4, 2.0: 2}),
+				("10_6_4", {0.5: 10, 1.0:6, 1.5:4, 2.0: 2, 2.5: 1}),
+				("10_6_5", {0.5: 10, 1.0:6, 1.5:4, 2.0: 1}),
+				("10_6_6", {0.5: 10, 1.0:6, 1.5:2, 2.0: 1}),
+				("10_6_7", {0.5: 10, 1.0:6, 1.5:3, 2.0: 2}),
+				("10_6_8", {0.5: 10, 1.0:6, 1.5:2, 2.0: 1}),
+				("10_4_1", {0.5: 10, 1.0:4, 1.5:3, 2.0: 2}),
+				("10_4_2", {0.5: 10, 1.0:4, 1.5:2, 2.0: 1}),
+				("10_2", {0.5: 10, 1.0:2, 1.5:1}),
+				("8_6_1", {0.5: 8, 1.0:6}),
+				("8_6_2", {0.5: 8, 1.0:6, 1.5: 5, 2.0: 4}),
+				("8_6_3", {0.5: 8, 1.0:6, 1.5: 4, 2.0: 2}),
+				("8_6_4", {0.5: 8, 1.0:6, 1.5:4, 2.0: 2, 2.5: 1}),
+				("8_6_5", {0.5: 8, 1.0:6, 1.5:4, 2.0: 1}),
+				("8_6_6", {0.5: 8, 1.0:6, 1.5:2, 2.0: 1}),
+				("8_6_7", {0.5: 8, 1.0:6, 1.5:3, 2.0: 2}),
+				("8_6_8", {0.5: 8, 1.0:6, 1.5:2, 2.0: 1}),
+				("8_4_1", {0.5: 8, 1.0:4, 1.5:3, 2.0: 2}),
+				("8_4_2", {0.5: 8, 1.0:4, 1.5:2, 2.0: 1}),
+				("8_2", {0.5: 8, 1.0:2, 1.5:1}),
+				("6_4_1", {0.5: 6, 1.0:4, 1.5:3, 2.0: 2}),
+				("6_4_2", {0.5: 6, 1.0:4, 1.5:2, 2.0: 1}),
+				("6_2", {0.5: 6, 1.0:2, 1.5:1}),
+			],
+		},
+	],
+}
@@ -13,7 +13,8 @@ where data is stored]". The directory should contain files with preparsed data o
 %gra: [parse of sentence]
 And should use "CHI" to indicate the child is speaking
 
-A list of learners is set up in the main() function. This list can be altered.
+The learners are built from the spec in Sweep.DEFAULT_SPEC. A different
+spec can be given as a json file with "--sweep [spec file]" (see Sweep.py).
 Documentation on the parameters for different learners can be found in 
 Learner.py
 
@@ -28,19 +29,32 @@ observed/number_constructions- the average number of constructions every 10 time
 	over all of the experiments for an observed distribution
 observed/order- the average order constructions were acquired over all the experiments
 	for an observed distribution
+number_constructions_variance and order_variance- the variance over the experiments of
+	number_constructions and order, in both uniform/ and observed/
 
-The order and number of constructions for each trial are also stored in seperate folders
+With "--trial-files", the order and number of constructions for each trial are also 
+stored in seperate folders
+
+Options:
+--processes [n]- number of worker processes used to run the trials (0 uses every core)
+--seed [n]- master seed of the trials, makes the results reproducible
+--trial-files- also write the results of every trial
+--sweep [spec file]- json file with the spec of the learners
+-q/-v- print nothing/print every file read and every step
 
 '''
 
 import Extract_data
 import Helper
 import Learner
+import Sweep
 import numpy as np
 import pandas as pd 
+import argparse
+import multiprocessing
 import os
 import operator
-import sys
+import random
 
 DATA_DIR = "Sachs"
 NUM_TIME_STEPS = 100
@@ -48,6 +62,31 @@ TIMES_TO_RUN = 30
 DIVISIONS = 10
 UNIFORM_OUT_DIRECTORY = "results/theoretical_experiments/uniform"
 OBSERVED_OUT_DIRECTORY = "results/theoretical_experiments/results_observed"
+#number of worker processes used to extract the CHILDES files and to run
+#trials (None uses every core)
+PROCESSES = 1
+#master seed of the trials. None gives different results every run
+SEED = None
+#if True, the verb constructions are read from a compiled cache in the
+#data directory (see Extract_data.CorpusCache) instead of reparsing every file
+USE_CORPUS_CACHE = True
+#if True, the results of every trial are also written to 
+#[output dir]/number_constructions/ and [output dir]/order/ (see 
+#run_trial). The averages are kept in memory either way
+WRITE_TRIAL_FILES = False
+#format of the files of every trial, "csv" or "npz" (see 
+#Helper.write_columns)
+OUTPUT_FORMAT = "csv"
+#if True, the distances between all constructions of the corpus are 
+#computed once (or loaded from the data directory, see 
+#Extract_data.load_distance_matrix) and looked up by the learners
+USE_DISTANCE_MATRIX = True
+#json file with the spec of the learners to test (see Sweep.py). If None,
+#Sweep.DEFAULT_SPEC is used
+SWEEP_FILE = None
+#distances are saved here so that reruns on the same corpus start warm.
+#set to None to keep the distance cache in memory only
+DISTANCE_CACHE_FILE = None
 
 '''
 Get results
@@ -68,7 +107,7 @@ Get results
 				the data
 '''
 def get_results(directory, learners, constructions):
-	print("Getting results")
+	Helper.log("Getting results")
 
 	#num_constructions is a dictionary mapping from names of learners to
 	#a list of construction numbers at each time step
@@ -91,12 +130,11 @@ def get_results(directory, learners, constructions):
 	#			Num_constructions
 	##########################################
 	number_list = os.listdir(number_const_dir)
-	print("calculating number of constructions")
+	Helper.log("calculating number of constructions", Helper.VERBOSE)
 	for number_file in number_list:
 		curr_file = number_const_dir + number_file
-		print("reading from %s" % curr_file)
-		df = pd.read_csv(curr_file)
-		df = df.drop(labels=" ", axis=1)
+		Helper.log("reading from %s" % curr_file, Helper.VERBOSE)
+		df = Helper.read_columns(curr_file)
 		for key in df.keys():
 			for i in range(NUM_TIME_STEPS/DIVISIONS):
 				#add the number of constructions known by the learner at
@@ -114,31 +152,16 @@ def get_results(directory, learners, constructions):
 		for i in range(NUM_TIME_STEPS/DIVISIONS):
 			num_constructions[learner][i] = float(num_constructions[learner][i]) / len(number_list)
 
-	#write to file
-	number_out = directory + "/number_constructions.csv"
-	with open(number_out, "w+") as outfile:
-		first_line = ""
-		for learner in learners:
-			first_line += learner + ", "
-		outfile.write(first_line + "\n")
-		for i in range(NUM_TIME_STEPS/DIVISIONS):
-			curr_line = ""
-			for learner in learners:
-				curr_line += str(num_constructions[learner][i]) + ", "
-			outfile.write(curr_line + "\n")
-			
-
 	##########################################
 	#				Order
 	##########################################
 	order_list = os.listdir(order_dir)
-	print(order_list)
-	print("calculating Order")
+	Helper.log(order_list, Helper.VERBOSE)
+	Helper.log("calculating Order", Helper.VERBOSE)
 	for order_file in order_list:
 		curr_file = order_dir + order_file
-		print("reading from %s" % curr_file)
-		df = pd.read_csv(curr_file)
-		df = df.drop(labels=" ", axis=1)
+		Helper.log("reading from %s" % curr_file, Helper.VERBOSE)
+		df = Helper.read_columns(curr_file)
 		for key in df.keys():
 			#keep track of which constructions have been seen
 			seen_const = []
@@ -156,14 +179,45 @@ def get_results(directory, learners, constructions):
 	#average for constructions
 	for learner in learners:
 		for const in constructions:
-			order[learner][const] = order[learner][const]/len(order_list)
+			order[learner][const] = float(order[learner][const])/len(order_list)
+
+	write_results(directory, learners, constructions, num_constructions, order)
+
+
+'''
+Write results
+
+	purpose: writes the averages found by get_results or by a 
+			TrialAggregator
+	inputs: directory is the directory to write to
+			learners is the list of learner names
+			constructions is a list of constructions
+			num_constructions maps the name of each learner to the list of
+				average numbers of constructions at each time step
+			order maps the name of each learner to a dict from each 
+				construction to its average acquisition position
+	outputs: writes directory/number_constructions.csv and 
+			directory/order.csv (see get_results)
+'''
+def write_results(directory, learners, constructions, num_constructions, order):
+	#write to file
+	number_out = directory + "/number_constructions.csv"
+	with open(number_out, "w+") as outfile:
+		first_line = ""
+		for learner in learners:
+			first_line += learner + ", "
+		outfile.write(first_line + "\n")
+		for i in range(NUM_TIME_STEPS/DIVISIONS):
+			curr_line = ""
+			for learner in learners:
+				curr_line += str(num_constructions[learner][i]) + ", "
+			outfile.write(curr_line + "\n")
 
 	#sort order in order to output
 	sorted_order = {}
 	for learner in learners:
 		sorted_order[learner] = sorted(order[learner].items(), key=operator.itemgetter(1))
 
-	
 	#write to file
 	order_out = directory + "/order.csv"
 	with open(order_out, "w+") as outfile:
@@ -178,6 +232,93 @@ def get_results(directory, learners, constructions):
 			outfile.write(curr_line + "\n")
 
 
+'''
+Trial aggregator
+
+	Keeps running sums and sums of squares of the results of the trials 
+	of one output directory as they finish, so that the averages (and
+	variances) written by get_results are available without reading the
+	trial files back from disk
+	inputs: learners is the list of learner names (the columns of the
+				trial results)
+			constructions is a list of constructions (as ids in 
+				Extract_data.VOCABULARY)
+	add_trial takes the two arrays returned by run_trial:
+		num_known has the number of constructions known by each learner 
+			at every 10th step. Rows after the end of the trial count as 
+			knowing every construction
+		positions has the acquisition position of every construction 
+			(rows, in the order of constructions) for each learner, 
+			len(constructions) if it wasn't acquired
+'''
+class TrialAggregator:
+	def __init__(self, learners, constructions):
+		self.learners = list(learners)
+		self.constructions = list(constructions)
+		self.num_rows = NUM_TIME_STEPS / DIVISIONS
+		self.trials = 0
+		self.num_sum = np.zeros((self.num_rows, len(self.learners)), dtype=np.int64)
+		self.num_square_sum = np.zeros((self.num_rows, len(self.learners)), dtype=np.int64)
+		self.position_sum = np.zeros((len(self.constructions), len(self.learners)), dtype=np.int64)
+		self.position_square_sum = np.zeros((len(self.constructions), len(self.learners)), dtype=np.int64)
+
+	def add_trial(self, num_known, positions):
+		num_known = np.asarray(num_known, dtype=np.int64)[:self.num_rows]
+		padded = np.empty((self.num_rows, len(self.learners)), dtype=np.int64)
+		padded[:] = len(self.constructions)
+		padded[:len(num_known)] = num_known
+		positions = np.asarray(positions, dtype=np.int64)
+		self.num_sum += padded
+		self.num_square_sum += padded * padded
+		self.position_sum += positions
+		self.position_square_sum += positions * positions
+		self.trials += 1
+
+	def get_trials(self):
+		return self.trials
+
+	#average number of constructions known (rows are every 10th step)
+	def get_num_known_mean(self):
+		return self.num_sum / float(self.trials)
+
+	def get_num_known_variance(self):
+		mean = self.get_num_known_mean()
+		return self.num_square_sum / float(self.trials) - mean * mean
+
+	#average acquisition position (rows are constructions)
+	def get_position_mean(self):
+		return self.position_sum / float(self.trials)
+
+	def get_position_variance(self):
+		mean = self.get_position_mean()
+		return self.position_square_sum / float(self.trials) - mean * mean
+
+	'''
+	writes the files written by get_results, plus 
+	directory/number_constructions_variance.csv and 
+	directory/order_variance.csv with the variances over the trials (rows
+	of order_variance are the constructions)
+	'''
+	def write(self, directory):
+		names = Extract_data.VOCABULARY.get_constructions(self.constructions)
+		num_known = self.get_num_known_mean()
+		positions = self.get_position_mean().tolist()
+		num_constructions = {}
+		order = {}
+		for column in range(len(self.learners)):
+			learner = self.learners[column]
+			num_constructions[learner] = num_known[:, column].tolist()
+			order[learner] = {}
+			for row in range(len(names)):
+				order[learner][names[row]] = positions[row][column]
+		write_results(directory, self.learners, names, num_constructions, order)
+
+		Helper.write_columns(directory + "/number_constructions_variance.csv", self.learners, self.get_num_known_variance())
+		variances = self.get_position_variance().tolist()
+		Helper.write_columns(directory + "/order_variance.csv", ["construction"] + self.learners, 
+			[[names[row]] + variances[row] for row in range(len(names))])
+
+
 '''
 Consolidate num results
 
@@ -346,6 +487,63 @@ def consolidate_order_results(directory, constructions):
 
 
 
+'''
+Input stream
+
+	Stream of constructions drawn independently from a distribution.
+	Draws a block of block_size constructions at a time by searching the
+	cumulative distribution (computed once) for uniform random numbers.
+	The stream only depends on the seed, so reset() replays it from the
+	start and two streams with the same seed give the same constructions
+	inputs: constructions is a list of constructions
+			distribution is a list of probabilities associated with each
+				construction
+			seed seeds the stream (None gives a different stream every time)
+'''
+class InputStream:
+	def __init__(self, constructions, distribution, seed=None, block_size=1000):
+		self.constructions = np.asarray(constructions)
+		cdf = np.cumsum(distribution, dtype=np.float64)
+		self.cdf = cdf / cdf[-1]
+		self.seed = seed
+		self.block_size = block_size
+		self.reset()
+
+	#restarts the stream from its seed
+	def reset(self):
+		self.rng = np.random.RandomState(self.seed)
+		self.block = []
+		self.position = 0
+
+	#returns the indices (into constructions) of the next num draws
+	def draw_indices(self, num):
+		indices = self.cdf.searchsorted(self.rng.random_sample(num), side="right")
+		#guards against the last value of the cdf rounding below 1
+		return np.minimum(indices, len(self.cdf) - 1)
+
+	#returns the next num constructions of the stream as a list. Drawing
+	#them at once gives the same constructions as calling next() num times
+	def take(self, num):
+		taken = self.block[self.position:self.position + num]
+		self.position += len(taken)
+		if (len(taken) < num):
+			taken = taken + self.constructions[self.draw_indices(num - len(taken))].tolist()
+		return taken
+
+	def next(self):
+		if (self.position == len(self.block)):
+			self.block = self.constructions[self.draw_indices(self.block_size)].tolist()
+			self.position = 0
+		self.position += 1
+		return self.block[self.position - 1]
+
+	def __iter__(self):
+		return self
+
+	def get_seed(self):
+		return self.seed
+
+
 '''
 run theoretical experiment
 
@@ -353,13 +551,21 @@ run theoretical experiment
 				distribution to see the rate at which different learners
 				acquire all cosntructions and the order they acquire them
 				in.
-	inputs: constructions is a list of constructions
+	inputs: constructions is a list of constructions (as ids in 
+				Extract_data.VOCABULARY)
 			distribution is a list of probabilities associated with each
 				construction
-			learners is a dict of named learners
+			learners is a dict of named learners (Learner objects or members
+				of a population)
 			output_dir is where the output should be stored
 			times is the number of times to run through the experiment 
 				before averaging to find results
+			seed is the master seed the seeds of the trials are drawn from
+				(see get_trial_seeds). If None, the trials are not 
+				reproducible
+			processes is the number of worker processes to run trials in 
+				(None uses every core). The results for a given seed are 
+				the same for any number of processes
 
 	outputs:will write two sets of files:
 				1) number of constructions at each time step, which
@@ -374,250 +580,381 @@ run theoretical experiment
 						learner1,	learner2, 	...
 						l1_const1,	l2_const1,	...
 						l1_const2,	l2_const2,	...
+				these are only written if WRITE_TRIAL_FILES. Returns the
+				TrialAggregator of the trials, which has the averages
+				get_results would compute from these files
 
 '''
-def run_theoretical_experiments(constructions, distribution, learners, output_dir, times):
-	#print("Running theoretical experiments")
-	construction_num = len(constructions)
+def run_theoretical_experiments(constructions, distribution, learners, output_dir, times, seed=None, processes=1):
+	seeds = get_trial_seeds(seed, times)
+	tasks = []
+	for iteration in range(times):
+		tasks.append((constructions, distribution, output_dir, iteration, seeds[iteration]))
+	return run_trials(tasks, learners, processes)[output_dir]
 
-	#make directories if necessary
-	if not os.path.exists(output_dir):
-		#print("Making directory '%s'" % output_dir)
-		os.makedirs(output_dir)
 
-	outfile1_dir = output_dir + "/number_constructions/"
-	outfile2_dir = output_dir + "/order/"
-	if not os.path.exists(outfile1_dir):
-		#print("Making directory '%s'" % outfile1_dir)
-		os.makedirs(outfile1_dir)
-	if not os.path.exists(outfile2_dir):
-		#print("Making directory '%s'" % outfile2_dir)
-		os.makedirs(outfile2_dir)
+'''
+Get trial seeds
 
-	for iteration in range(times):
-		#print("beginning iteration number %s" % iteration)
-		outfile1_name = outfile1_dir + str(iteration)
-		outfile2_name = outfile2_dir + str(iteration)
-		finished_iteration = False
-
-		#write learner names for experiments 1 and 2
-		#experiment 1
-		with open(outfile1_name, "w+") as outfile1:
-			curr_line = ""
-			for learner in learners.keys():
-				curr_line += str(learner) 
-				curr_line += ", "
-			curr_line += "\n"
-			outfile1.write(curr_line)
-		#experiment 2
-		with open(outfile2_name, "w+") as outfile2:
-			curr_line = ""
-			for learner in learners.keys():
-				curr_line += str(learner) 
-				curr_line += ", "
-			curr_line += "\n"
-			outfile2.write(curr_line)
-
-		#wait until every learner knowns every construction
-		input_num = 1
-		while(not finished_iteration):
-			#print("input number %s" % input_num)
-			#feed random construction to learners
-			curr_input = np.random.choice(constructions, p=distribution)
-			for learner in learners.keys():
-				learners[learner].take_input(curr_input)
-
-			#write the current state of each learner for experiment 
-			#only do this every 10th step
-			if (input_num % 10 == 0):
-				with open(outfile1_name, "a") as outfile1:
-					curr_line = ""
-					for learner in learners.keys():
-						curr_line += str(len(learners[learner].get_known()))
-						curr_line += ", "
-					curr_line += "\n"
-					outfile1.write(curr_line)
-
-
-			#check if every learner knows every construction
-			#total complete is the number of learners that know all of 
-			#the vocab
-			total_complete = 0
-			for learner in learners.keys():
-				if (len(learners[learner].get_known()) == construction_num):
-					total_complete += 1
-			if (total_complete == len(learners.keys())):
-				finished_iteration = True
-
-			input_num += 1
-			print("step number " + str(input_num))
-			if (input_num > NUM_TIME_STEPS):
-				finished_iteration = True
+	inputs: seed is the master seed (None draws a random master seed)
+			num is the number of trials
+	outputs: returns a list of num seeds, one per trial. The same master
+			seed always gives the same seeds
+'''
+def get_trial_seeds(seed, num):
+	return np.random.RandomState(seed).randint(0, 2**31 - 1, size=num).tolist()
 
-		#write order for experiment 2
-		with open(outfile2_name, "a") as outfile2:
-			#write learner names
-			curr_line = ""
-			for learner in learners.keys():
-				curr_line += str(learner)
-				curr_line += ", "
-			curr_line += "\n"
-
-			#write order
-			for order_number in range(construction_num):
-				curr_line = ""
-				for learner in learners.keys():
-					#if the learner hasn't picked up that number of constructions,
-					#write "-" instead
-					try:
-						curr_line += str(learners[learner].get_known()[order_number])
-					except:
-						curr_line += "-"
-					curr_line += ", "
-				curr_line += "\n"
-				outfile2.write(curr_line)
-		for learner in learners.keys():
-			learners[learner].reset()
 
+'''
+Run trials
 
+	inputs: tasks is a list of (constructions, distribution, output_dir, 
+				iteration, seed) tuples, one per trial (see run_trial)
+			learners is a dict of named learners
+			processes is the number of worker processes (None uses every
+				core). If 1, the trials are run in this process
+	outputs: runs every trial. Every worker gets its own copy of the 
+			learners, and every trial is seeded with its own seed, so the
+			results don't depend on the number of processes. The distances
+			the workers compute are merged into Helper.DISTANCE_CACHE, so
+			that it can be saved.
+			Returns a dict mapping every output_dir to the TrialAggregator 
+			of its trials
+'''
+def run_trials(tasks, learners, processes=1):
+	names = sorted(learners.keys())
+	aggregators = {}
+	for constructions, distribution, output_dir, iteration, seed in tasks:
+		make_output_dirs(output_dir)
+		if (output_dir not in aggregators):
+			aggregators[output_dir] = TrialAggregator(names, constructions)
+
+	trials = Helper.Progress("trials", len(tasks))
+	if (processes == 1 or len(tasks) <= 1):
+		for task in tasks:
+			num_known, positions = run_trial(*(task[:2] + (learners,) + task[2:]))
+			aggregators[task[2]].add_trial(num_known, positions)
+			trials.update()
+		trials.finish()
+		return aggregators
+
+	pool = multiprocessing.Pool(processes, _init_trial_worker, (learners, Extract_data.VOCABULARY, Helper.DISTANCE_MATRIX))
+	try:
+		#the sums are of integers, so the order trials finish in doesn't
+		#change them
+		for output_dir, num_known, positions, cached in pool.imap_unordered(_run_trial_task, tasks):
+			aggregators[output_dir].add_trial(num_known, positions)
+			Helper.DISTANCE_CACHE.merge(*cached)
+			trials.update()
+	finally:
+		pool.terminate()
+		pool.join()
+	trials.finish()
+	return aggregators
+
+#learners of a worker process, set by _init_trial_worker
+_worker_learners = None
+
+def _init_trial_worker(learners, vocabulary, distance_matrix):
+	global _worker_learners
+	_worker_learners = learners
+	Extract_data.VOCABULARY = vocabulary
+	Helper.set_distance_matrix(distance_matrix)
+	Helper.DISTANCE_CACHE.track_new()
+
+#also returns the distances the trial added to the worker's cache and its
+#hits and misses, to be merged into the main process's cache
+def _run_trial_task(task):
+	constructions, distribution, output_dir, iteration, seed = task
+	cache = Helper.DISTANCE_CACHE
+	hits, misses = cache.get_hits(), cache.get_misses()
+	num_known, positions = run_trial(constructions, distribution, _worker_learners, output_dir, iteration, seed)
+	cached = (cache.take_new(), cache.get_hits() - hits, cache.get_misses() - misses)
+	return output_dir, num_known, positions, cached
+
+
+#make directories if necessary
+def make_output_dirs(output_dir):
+	directories = [output_dir]
+	if (WRITE_TRIAL_FILES):
+		directories += [output_dir + "/number_constructions/", output_dir + "/order/"]
+	for directory in directories:
+		if not os.path.exists(directory):
+			#print("Making directory '%s'" % directory)
+			try:
+				os.makedirs(directory)
+			except OSError:
+				#made by another process in the meantime
+				pass
 
-	'''
-	#consolidate results
-	get_results(output_dir, learners.keys())
-	'''
+
+'''
+run trial
+
+	purpose: runs one trial of run_theoretical_experiments and, if 
+				WRITE_TRIAL_FILES, writes its files 
+				(output_dir/number_constructions/[iteration] and 
+				output_dir/order/[iteration])
+	inputs: constructions, distribution, learners and output_dir are the 
+				same as for run_theoretical_experiments
+			iteration is the number of the trial
+			seed seeds both the input stream and the random numbers used by
+				the learners
+	outputs: returns the number of constructions known by each learner
+			(columns in sorted order of the names) at every 10th step and 
+			the acquisition position of every construction for each 
+			learner (see TrialAggregator)
+'''
+def run_trial(constructions, distribution, learners, output_dir, iteration, seed):
+	construction_num = len(constructions)
+	outfile1_name = output_dir + "/number_constructions/" + str(iteration)
+	outfile2_name = output_dir + "/order/" + str(iteration)
+	finished_iteration = False
+
+	#sorted so that the order random numbers are used in doesn't depend
+	#on the order of the dict
+	names = sorted(learners.keys())
+	#learners that are simulated together share one engine
+	engines = Learner.get_engines(learners)
+	for engine in engines:
+		engine.reset()
+	stream = InputStream(constructions, distribution, seed)
+	random.seed(seed)
+	#steps are only reported when verbose, run_trials reports trials
+	steps = Helper.Progress("steps", NUM_TIME_STEPS, level=Helper.VERBOSE)
+
+	#number of constructions known by each learner at every 10th step
+	#(written once the trial is over)
+	num_known = Helper.ColumnBuffer(names, NUM_TIME_STEPS / 10, dtype=np.int64)
+
+	#the inputs of the whole trial are drawn up front. Engines that can
+	#simulate all of them at once (see Learner.fast_forward) aren't 
+	#stepped, the number of constructions of their learners at every 
+	#step comes from the steps they learned constructions at
+	inputs = stream.take(NUM_TIME_STEPS)
+	engines = [engine for engine in engines if not engine.fast_forward(inputs)]
+	stepped = set([id(engine) for engine in engines])
+	#acquisition_steps[column] is the sorted array of steps the 
+	#fast-forwarded learner in that column learned at. They are all
+	#finished by last_finish (NUM_TIME_STEPS if one of them never is)
+	acquisition_steps = {}
+	last_finish = 0
+	for column in range(len(names)):
+		learner = learners[names[column]]
+		if (id(learner.get_engine()) not in stepped):
+			acquisition_steps[column] = np.sort(np.array(learner.get_acquisition_steps().values(), dtype=np.int64))
+			if (len(acquisition_steps[column]) < construction_num):
+				last_finish = NUM_TIME_STEPS
+			elif (construction_num > 0):
+				last_finish = max(last_finish, acquisition_steps[column][-1])
+
+	#number of constructions known by each learner at input number step
+	def get_known_counts(step):
+		for column in acquisition_steps:
+			known_counts[column] = np.searchsorted(acquisition_steps[column], step, side="right")
+		return known_counts
+
+	#learners that know every construction are retired: they get no more
+	#input and their final number of constructions is carried forward.
+	#active is the list of columns (in names) of the stepped learners 
+	#still working and working[id(engine)] the number of them an engine 
+	#has
+	known_counts = np.zeros(len(names), dtype=np.int64)
+	active = [column for column in range(len(names)) if column not in acquisition_steps]
+	working = {}
+	for column in active:
+		engine_id = id(learners[names[column]].get_engine())
+		working[engine_id] = working.get(engine_id, 0) + 1
+
+	#wait until every learner knowns every construction
+	input_num = 1
+	while(not finished_iteration):
+		if (len(active) == 0):
+			#only fast-forwarded learners are left, so skip to the step 
+			#where they are all finished
+			last_step = min(NUM_TIME_STEPS, max(input_num, last_finish))
+			for snapshot in range(input_num + (-input_num) % 10, last_step + 1, 10):
+				num_known.add_row(get_known_counts(snapshot))
+			steps.update(last_step - input_num + 1)
+			break
+
+		#print("input number %s" % input_num)
+		#feed random construction to learners
+		curr_input = inputs[input_num - 1]
+		for engine in engines:
+			engine.take_input(curr_input)
+
+		#check which learners now know every construction
+		still_active = []
+		for column in active:
+			learner = learners[names[column]]
+			known_counts[column] = len(learner.get_known())
+			if (known_counts[column] == construction_num):
+				learner.retire()
+				engine_id = id(learner.get_engine())
+				working[engine_id] -= 1
+				if (working[engine_id] == 0):
+					engines = [engine for engine in engines if id(engine) != engine_id]
+			else:
+				still_active.append(column)
+		active = still_active
+
+		#write the current state of each learner for experiment 
+		#only do this every 10th step
+		if (input_num % 10 == 0):
+			num_known.add_row(get_known_counts(input_num))
+
+		#finished when every learner knows every construction
+		if (len(active) == 0 and input_num >= last_finish):
+			finished_iteration = True
+
+		input_num += 1
+		steps.update()
+		if (input_num > NUM_TIME_STEPS):
+			finished_iteration = True
+
+	steps.finish()
+
+	#acquisition position of every construction for each learner
+	#(len(constructions) if it wasn't acquired)
+	indices = dict([(constructions[i], i) for i in range(construction_num)])
+	positions = np.empty((construction_num, len(names)), dtype=np.int64)
+	positions[:] = construction_num
+	for column in range(len(names)):
+		known = learners[names[column]].get_known()
+		for order_number in range(min(len(known), construction_num)):
+			positions[indices[known[order_number]], column] = order_number
+
+	if (WRITE_TRIAL_FILES):
+		#write number of constructions for experiment 1
+		num_known.write(outfile1_name, OUTPUT_FORMAT)
+
+		#write order for experiment 2
+		#if the learner hasn't picked up that number of constructions,
+		#write "-" instead
+		order = [["-"] * len(names) for order_number in range(construction_num)]
+		for column in range(len(names)):
+			known = learners[names[column]].get_known()
+			for order_number in range(min(len(known), construction_num)):
+				order[order_number][column] = Extract_data.VOCABULARY.get_construction(known[order_number])
+		Helper.write_columns(outfile2_name, names, order, OUTPUT_FORMAT)
+	#engines that were fast-forwarded or retired are no longer in engines
+	for engine in Learner.get_engines(learners):
+		engine.reset()
+	return num_known.get_values(), positions
 
 
 def main():
 	###############################################################
 	#	get constructions and data_distribution from speech data
 	###############################################################
-	print("Extracting data")
+	Helper.log("Extracting data")
 	speech_data = Extract_data.SpeechData()
-	speech_data.add_from_dir(DATA_DIR)
+	speech_data.add_from_dir(DATA_DIR, PROCESSES, use_cache=USE_CORPUS_CACHE)
 	data_distribution = speech_data.get_construction_likelihoods()
 	#extract to two seperate lists for convenience
+	#constructions are ids in Extract_data.VOCABULARY
 	constructions = []
 	distribution_observed = []
-	for key in data_distribution.keys():
+	for key in sorted(data_distribution.keys()):
 		constructions.append(key)
 		distribution_observed.append(data_distribution[key])
 
 	###########################################
 	#			Set up distributions
 	###########################################
-	print("Setting up distributions")
+	Helper.log("Setting up distributions")
 	distributions = {}
 	distributions["observed"] = distribution_observed
 	distributions["uniform"] = [(1.0/len(constructions)) for i in range(len(constructions))]
 
+	if (USE_DISTANCE_MATRIX):
+		Helper.log("Loading distance matrix")
+		Helper.set_distance_matrix(Extract_data.load_distance_matrix(DATA_DIR, constructions, PROCESSES, USE_CORPUS_CACHE))
+
 	######################################
 	#			set up learners
 	######################################
-	print("Setting up Learners")
-	learners = {}
-	#frequentist
-	learners["frequentist_1"] = Learner.FrequentistLearner(learn_times=1)
-	learners["frequentist_2"] = Learner.FrequentistLearner(learn_times=2)
-	learners["frequentist_3"] = Learner.FrequentistLearner(learn_times=3)
-	learners["frequentist_5"] = Learner.FrequentistLearner(learn_times=5)
-	learners["frequentist_10"] = Learner.FrequentistLearner(learn_times=10)
-	learners["frequentist_15"] = Learner.FrequentistLearner(learn_times=15)
-	#Complexity-Based
-	learners["ComplexityBased_1"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:1})
-	learners["ComplexityBased_09_1"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9})
-	learners["ComplexityBased_09_2"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.8})
-	learners["ComplexityBased_09_3"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.7})
-	learners["ComplexityBased_09_4"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.6})
-	learners["ComplexityBased_09_5"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.5})
-	learners["ComplexityBased_09_6"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.4})
-	learners["ComplexityBased_09_7"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.4, 3.0:0.2})
-	learners["ComplexityBased_09_8"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.4, 2.5: 0.2, 3.0:0.1})
-	learners["ComplexityBased_09_9"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.4, 2.5: 0.1, 3.0:0.05})
-	learners["ComplexityBased_08_1"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8})
-	learners["ComplexityBased_08_2"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.7})
-	learners["ComplexityBased_08_3"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.6})
-	learners["ComplexityBased_08_4"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.5})
-	learners["ComplexityBased_08_5"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.4})
-	learners["ComplexityBased_08_6"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.4, 3.0:0.2})
-	learners["ComplexityBased_08_7"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.4, 2.5: 0.2, 3.0:0.1})
-	learners["ComplexityBased_08_8"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.4, 2.5: 0.1, 3.0:0.05})
-	learners["ComplexityBased_07_1"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7})
-	learners["ComplexityBased_07_2"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.6})
-	learners["ComplexityBased_07_3"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.5})
-	learners["ComplexityBased_07_4"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.4})
-	learners["ComplexityBased_07_5"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.4, 3.0:0.2})
-	learners["ComplexityBased_07_6"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.4, 2.5: 0.2, 3.0:0.1})
-	learners["ComplexityBased_07_7"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.4, 2.5: 0.1, 3.0:0.05})
-	#Threshold
-	learners["Threshold_10_10"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:10})
-	learners["Threshold_10_8_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8})
-	learners["Threshold_10_8_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6})
-	learners["Threshold_10_8_"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 3.0:4})
-	learners["Threshold_10_8_3"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4, 3.0: 2})
-	learners["Threshold_10_8_4"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4, 3.0: 2})
-	learners["Threshold_10_8_5"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4, 3.0: 1})
-	learners["Threshold_10_8_6"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4})
-	learners["Threshold_10_8_7"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 3, 3.0: 2})
-	learners["Threshold_10_8_8"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 3, 3.0: 1})
-	learners["Threshold_10_8_9"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 3})
-	learners["Threshold_10_8_10"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 1})
-	learners["Threshold_10_6_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6})
-	learners["Threshold_10_6_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5: 5, 2.0: 4})
-	learners["Threshold_10_6_3"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5: 4, 2.0: 2})
-	learners["Threshold_10_6_4"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:4, 2.0: 2, 2.5: 1})
-	learners["Threshold_10_6_5"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:4, 2.0: 1})
-	learners["Threshold_10_6_6"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:2, 2.0: 1})
-	learners["Threshold_10_6_7"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:3, 2.0: 2})
-	learners["Threshold_10_6_8"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:2, 2.0: 1})
-	learners["Threshold_10_4_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:4, 1.5:3, 2.0: 2})
-	learners["Threshold_10_4_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:4, 1.5:2, 2.0: 1})
-	learners["Threshold_10_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:2, 1.5:1})
-	learners["Threshold_8_6_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6})
-	learners["Threshold_8_6_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5: 5, 2.0: 4})
-	learners["Threshold_8_6_3"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5: 4, 2.0: 2})
-	learners["Threshold_8_6_4"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:4, 2.0: 2, 2.5: 1})
-	learners["Threshold_8_6_5"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:4, 2.0: 1})
-	learners["Threshold_8_6_6"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:2, 2.0: 1})
-	learners["Threshold_8_6_7"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:3, 2.0: 2})
-	learners["Threshold_8_6_8"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:2, 2.0: 1})
-	learners["Threshold_8_4_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:4, 1.5:3, 2.0: 2})
-	learners["Threshold_8_4_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:4, 1.5:2, 2.0: 1})
-	learners["Threshold_8_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:2, 1.5:1})
-	learners["Threshold_6_4_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 6, 1.0:4, 1.5:3, 2.0: 2})
-	learners["Threshold_6_4_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 6, 1.0:4, 1.5:2, 2.0: 1})
-	learners["Threshold_6_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 6, 1.0:2, 1.5:1})
+	Helper.log("Setting up Learners")
+	#learners are built from a spec (see Sweep.py). Learners of a type 
+	#that can share work are simulated together
+	if (SWEEP_FILE):
+		sweep = Sweep.load_spec(SWEEP_FILE)
+	else:
+		sweep = Sweep.Sweep(Sweep.DEFAULT_SPEC)
 
 
 	###################################################
 	#		Run Experiments on Artificial Data
 	###################################################
-	#uniform
-	run_theoretical_experiments(constructions, distributions["uniform"], learners, UNIFORM_OUT_DIRECTORY, TIMES_TO_RUN)
-	learners_as_string = []
-	for learner in learners.keys():
-		learners_as_string.append(learner.strip())
-	get_results(UNIFORM_OUT_DIRECTORY, learners_as_string, constructions)
-	
-	#consolidate_num_results(UNIFORM_OUT_DIRECTORY, constructions, DIVISIONS)
-	#consolidate_order_results(UNIFORM_OUT_DIRECTORY, constructions)
-
-	#observed
-	run_theoretical_experiments(constructions, distributions["observed"], learners, OBSERVED_OUT_DIRECTORY, TIMES_TO_RUN)
-	learners_as_string = []
-	for learner in learners.keys():
-		learners_as_string.append(learner.strip())
-	get_results(OBSERVED_OUT_DIRECTORY, learners_as_string, constructions)
-	
-	#consolidate_num_results(OBSERVED_OUT_DIRECTORY, constructions, DIVISIONS)
-	#consolidate_order_results(OBSERVED_OUT_DIRECTORY, constructions)
+	if (DISTANCE_CACHE_FILE):
+		Helper.DISTANCE_CACHE.load(DISTANCE_CACHE_FILE)
+
+	#every seed of the sweep is a separate run of the experiments
+	seeds = sweep.get_seeds(SEED)
+	for seed in seeds:
+		uniform_dir = UNIFORM_OUT_DIRECTORY
+		observed_dir = OBSERVED_OUT_DIRECTORY
+		if (len(seeds) > 1):
+			uniform_dir += "seed_%s/" % seed
+			observed_dir += "seed_%s/" % seed
+		learners = sweep.build()
+
+		#trials of both distributions are spread over the same worker processes
+		trial_seeds = get_trial_seeds(seed, 2 * TIMES_TO_RUN)
+		tasks = []
+		for iteration in range(TIMES_TO_RUN):
+			tasks.append((constructions, distributions["uniform"], uniform_dir, iteration, trial_seeds[iteration]))
+		for iteration in range(TIMES_TO_RUN):
+			tasks.append((constructions, distributions["observed"], observed_dir, iteration, trial_seeds[TIMES_TO_RUN + iteration]))
+		aggregators = run_trials(tasks, learners, PROCESSES)
+
+		#uniform
+		#(get_results computes the same files from the trial files)
+		aggregators[uniform_dir].write(uniform_dir)
+		#consolidate_num_results(uniform_dir, constructions, DIVISIONS)
+		#consolidate_order_results(uniform_dir, constructions)
+
+		#observed
+		aggregators[observed_dir].write(observed_dir)
+		#consolidate_num_results(observed_dir, constructions, DIVISIONS)
+		#consolidate_order_results(observed_dir, constructions)
+
+	if (DISTANCE_CACHE_FILE):
+		cache = Helper.DISTANCE_CACHE
+		Helper.log("Saving distance cache: %s hits, %s misses, %s distances" % 
+			(cache.get_hits(), cache.get_misses(), len(cache)))
+		cache.save(DISTANCE_CACHE_FILE)
 
 
 
 
 if __name__ == "__main__":
-	DATA_DIR = sys.argv[1]
+	parser = argparse.ArgumentParser(description="Tests learners on artificial data drawn from a CHILDES corpus")
+	parser.add_argument("data_dir", help="directory with the .cha files")
+	parser.add_argument("--processes", type=int, default=1,
+		help="number of worker processes (0 uses every core)")
+	parser.add_argument("--seed", type=int, default=None,
+		help="master seed, makes the results reproducible")
+	parser.add_argument("--trial-files", action="store_true",
+		help="also write the results of every trial")
+	parser.add_argument("-q", "--quiet", dest="verbosity", action="store_const",
+		const=Helper.SILENT, default=Helper.PROGRESS, help="print nothing")
+	parser.add_argument("-v", "--verbose", dest="verbosity", action="store_const",
+		const=Helper.VERBOSE, help="print every file read and every step")
+	parser.add_argument("--sweep", default=None,
+		help="json file with the spec of the learners (see Sweep.py)")
+	args = parser.parse_args()
+	Helper.set_verbosity(args.verbosity)
+	SWEEP_FILE = args.sweep
+
+	DATA_DIR = args.data_dir
 	if (DATA_DIR[-1] != "/"):
 		DATA_DIR += "/"
+	PROCESSES = args.processes or None
+	SEED = args.seed
+	WRITE_TRIAL_FILES = args.trial_files
 	UNIFORM_OUT_DIRECTORY = "results/artificial_data/" + DATA_DIR + "uniform/"
 	OBSERVED_OUT_DIRECTORY = "results/artificial_data/" + DATA_DIR + "observed/"
+	DISTANCE_CACHE_FILE = "results/artificial_data/" + DATA_DIR + "distance_cache.pkl"
 	main()
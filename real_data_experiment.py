@@ -12,7 +12,8 @@ with data in it]." The directory should contain files with preparsed data of the
 %gra: [parse of sentence]
 And should use "CHI" to indicate the child is speaking
 
-A list of learners is set up in the main() function. This list can be altered.
+The learners are built from the spec in Sweep.DEFAULT_SPEC. A different
+spec can be given as a json file with "--sweep [spec file]" (see Sweep.py).
 Documentation on the parameters for different learners can be found in 
 Learner.py
 
@@ -27,44 +28,77 @@ and average_F1 that averages for each learner over all test points.
 import Extract_data
 import Helper
 import Learner
+import Sweep
 import numpy as np
 import pandas as pd 
+import argparse
 import os
+import random
 import operator
-import sys
 
 DATA_DIR = "Sachs"
 OUTPUT_DIRECTORY = "results/real_experiments/"
+#number of worker processes used to extract the CHILDES files (None uses
+#every core)
+PROCESSES = 1
+#if True, the verb constructions are read from a compiled cache in the
+#data directory (see Extract_data.CorpusCache) instead of reparsing every 
+#file, and the distance matrix is saved there too. Nothing is written to
+#the data directory if False
+USE_CORPUS_CACHE = True
+#format of the recall, precision and f1 files, "csv" or "npz" (see 
+#Helper.write_columns)
+OUTPUT_FORMAT = "csv"
+#if True, the distances between all constructions of the corpus are 
+#computed once (or loaded from the data directory, see 
+#Extract_data.load_distance_matrix) and looked up by the learners
+USE_DISTANCE_MATRIX = True
+#json file with the spec of the learners to test (see Sweep.py). If None,
+#Sweep.DEFAULT_SPEC is used
+SWEEP_FILE = None
+#distances are saved here so that reruns on the same corpus start warm.
+#set to None to keep the distance cache in memory only
+DISTANCE_CACHE_FILE = None
 
 '''
-Statistical Functions (includes get_TP, get_FP, get_FN)
-
-	purpose: find the true positive, false positive, and false negative respectively
-	inputs: true_list is a list that contains constructions the child actually knows 
-			pred_list is a list that contains the constructions that the learner
-				predicts the child should known_const_num
-	outputs: return the TP, FP, FN respectively 	
+Statistical Functions: Confusion counts (TP, FP and FN)
+
+	Running TP, FP and FN of one learner against the constructions the 
+	child knows. Since the learner and the child only ever add known 
+	constructions, TP only changes when one of them learns a construction
+	the other one knows, and FP = known - TP, FN = child known - TP. 
+	update() counts the constructions the learner learned since the last 
+	update, child_learned(construction) has to be called after update() 
+	whenever the child learns a new construction
+	inputs: learner is a Learner (or population member)
+			child_known is the view of the child's known constructions
 '''
-def get_TP(true_list, pred_list):
-	TP = []
-	for construction in true_list:
-		if (construction in pred_list):
-			TP.append(construction)
-	return TP
-
-def get_FP(true_list, pred_list):
-	FP = []
-	for construction in pred_list:
-		if (construction not in true_list):
-			FP.append(construction)
-	return FP
-
-def get_FN(true_list, pred_list):
-	FN = []
-	for construction in true_list:
-		if (construction not in pred_list):
-			FN.append(construction)
-	return FN
+class ConfusionCounts:
+	def __init__(self, learner, child_known):
+		self.learner = learner
+		self.child_known = child_known
+		self.counted = 0
+		self.TP = 0
+
+	def update(self):
+		known = self.learner.get_known()
+		for i in range(self.counted, len(known)):
+			if (known[i] in self.child_known):
+				self.TP += 1
+		self.counted = len(known)
+
+	def child_learned(self, construction):
+		if (construction in self.learner.get_known()):
+			self.TP += 1
+
+	def get_TP(self):
+		return self.TP
+
+	def get_FP(self):
+		return self.counted - self.TP
+
+	def get_FN(self):
+		return len(self.child_known) - self.TP
 
 '''
 run real experiments 
@@ -72,19 +106,24 @@ run real experiments
 	purpose: runs experiments to compare the learners to the actual learning of
 				a child on a real dataset
 	inputs: speech_data is a SpeechData object that contains the utterances from
-				the corpus in the order they appear
-			learners is a list of Learner objects to simulate 
+				the corpus in the order they appear (see SpeechData.add_from_dir)
+			learners is a dict of named learners to simulate (Learner objects
+				or members of a population)
 			directory is the filepath to where the output files should be created
-	outputs:creates 3 files:
+	outputs:creates 4 files:
 				1) Recall.csv- lists the recalls of the learners at every 
 					occurence of a child utterance
 				2) Precision.csv- lists the precisions of the learners at every 
 					occurence of a child utterance
 				3) F1.csv- lists the F1 scores of the learners at every 
 					occurence of a child utterance
+				4) times.csv- lists the number of utterances (child and 
+					nonchild) up to and including every child utterance
 				all of these files contain a header with the name of the learner
 					and then each line contains the corresponding metric for a
 					single occurrence of a child utterance
+				(with OUTPUT_FORMAT "npz", the files are recall.npz etc. 
+					instead, see Helper.write_columns)
 '''
 def run_real_experiments(speech_data, learners, directory):
 	#########################################################
@@ -92,257 +131,172 @@ def run_real_experiments(speech_data, learners, directory):
 	#########################################################
 	#keep track of constructions the child has used, which we will assume
 	#are the only known constructions
-	child_construction = []
-	#also keep track of the known constructions of the learners and the child
-	#at the time a child utterance is made
-	known_constructions = []
-	#keep track of true positive, false positive, and false negative
-	#TP[i][learner] is the TP of learner at the ith child utterance
-	TP = []
-	FP = []
-	FN = []
-	#also keep track of recall, precision, and f1
-	#recall[i][learner] is the recall of learner at the ith child utterance
-	recall = []
-	precision = []
-	f1 = []
-	#store all files in order
-	files = os.listdir(DATA_DIR)
-	files.sort()
-	cha_files = []
-	for filename in files:
-			#ignore files that are not .cha files
-			if (".cha" in filename):
-				cha_files.append(filename)
-	cha_files.sort()
-
-	#increment every time a child construction is seen to keep track of 
-	#position in all of the lists
-	known_const_num = 0
-
-	for infile in cha_files:
-		filename = DATA_DIR + infile
-		#print(filename)
-		speech_data.add_file(filename)
-		#feed in utterances in order
-		#keep track of the number of instances in known_constructions
-		for i in range(len(speech_data.get_utterances_in_order())):
-			#print("%s/%s" % (i, len(speech_data.get_utterances_in_order())))
-			utterance = speech_data.get_utterances_in_order()[i]
-			print("%s: %s (%s)" % (utterance.get_speaker(), utterance.get_text()[:], utterance.get_verb_construction()))
-			#if parent utterance, show to learners
-			if (utterance.get_speaker() != "CHI"):
-				for learner in learners:
-					learners[learner].take_input(utterance.get_verb_construction())
-			
-			#if child utterance, update child_construction and update lists
-			else:
-				curr_const = utterance.get_verb_construction()
-				if (curr_const not in child_construction):
-					child_construction.append(curr_const)
-				known_constructions.append({})
-				TP.append({})
-				FP.append({})
-				FN.append({})
-				recall.append({})
-				precision.append({})
-				f1.append({})
-				known_constructions[known_const_num]["child"] = child_construction
-				for learner in learners:
-					known_constructions[known_const_num][learner] = learners[learner].get_known()
-					curr_TP = get_TP(child_construction, learners[learner].get_known())
-					curr_FP = get_FP(child_construction, learners[learner].get_known())
-					curr_FN = get_FN(child_construction, learners[learner].get_known())
-					TP[known_const_num][learner] = curr_TP
-					FP[known_const_num][learner] = curr_FP
-					FN[known_const_num][learner] = curr_FN
-					
-					#take care of case of division by 0. 
-					#recall (TP + FN can't be 0, so don't worry about that case)
-					recall[known_const_num][learner] = float(len(curr_TP))/(len(curr_TP) + len(curr_FN))
-					#precision (if failed, set to 1)
-					try:
-						precision[known_const_num][learner] = float(len(curr_TP))/(len(curr_TP) + len(curr_FP))
-					except:
-						precision[known_const_num][learner] = 1
-					#f1 (if failed, set to 0)
-					try:
-						f1[known_const_num][learner] = 2/((1/recall[known_const_num][learner]) + (1/precision[known_const_num][learner]))
-					except:
-						f1[known_const_num][learner] = 0 
-					
-					
-					
-				known_const_num += 1
-		speech_data.clear()
+	child_known = Learner.KnownConstructions()
+	child_construction = child_known.view()
+	#keep running counts of true positive, false positive, and false 
+	#negative for every learner
+	names = list(learners.keys())
+	counts = {}
+	for learner in names:
+		counts[learner] = ConfusionCounts(learners[learner], child_construction)
+	#keep track of recall, precision, and f1
+	#row i of recall holds the recalls of the learners (in the order of 
+	#names) at the ith child utterance
+	recall = Helper.ColumnBuffer(names)
+	precision = Helper.ColumnBuffer(names)
+	f1 = Helper.ColumnBuffer(names)
+	#number of utterances seen before each child utterance (used to weight
+	#the metrics by time in consolidate_results)
+	times = Helper.ColumnBuffer(["utterances"], dtype=np.int64)
+	utterance_num = 0
+
+	#learners that are simulated together share one engine
+	engines = Learner.get_engines(learners)
+
+	utterances = speech_data.get_utterances_in_order()
+	progress = Helper.Progress("utterances", len(utterances))
+	#feed in utterances in order
+	for utterance in utterances:
+		#main only reads transcriptions from the raw files at VERBOSE
+		if (Helper.is_logged(Helper.VERBOSE)):
+			Helper.log("%s: %s (%s)" % (utterance.get_speaker(), utterance.get_text(), utterance.get_verb_construction()), Helper.VERBOSE)
+		utterance_num += 1
+		progress.update()
+		#if parent utterance, show to learners
+		if (utterance.get_speaker() != "CHI"):
+			for engine in engines:
+				engine.take_input(utterance.get_construction_id())
+		
+		#if child utterance, update child_construction and update lists
+		else:
+			curr_const = utterance.get_construction_id()
+			#count what the learners learned since the last child 
+			#utterance before the child's construction is added
+			for learner in names:
+				counts[learner].update()
+			if (curr_const not in child_known):
+				child_known.add(curr_const)
+				for learner in names:
+					counts[learner].child_learned(curr_const)
+			curr_recall = []
+			curr_precision = []
+			curr_f1 = []
+			for learner in names:
+				curr_TP = counts[learner].get_TP()
+				curr_FP = counts[learner].get_FP()
+				curr_FN = counts[learner].get_FN()
+				
+				#take care of case of division by 0. 
+				#recall (TP + FN can't be 0, so don't worry about that case)
+				curr_recall.append(float(curr_TP)/(curr_TP + curr_FN))
+				#precision (if failed, set to 1)
+				try:
+					curr_precision.append(float(curr_TP)/(curr_TP + curr_FP))
+				except:
+					curr_precision.append(1)
+				#f1 (if failed, set to 0)
+				try:
+					curr_f1.append(2/((1/curr_recall[-1]) + (1/curr_precision[-1])))
+				except:
+					curr_f1.append(0)
+			recall.add_row(curr_recall)
+			precision.add_row(curr_precision)
+			f1.add_row(curr_f1)
+			times.add_row([utterance_num])
+	progress.finish()
 
 
 
 	##############################################
 	#			Write to output files
 	##############################################
-	recall_file = directory + "recall.csv"
-	precision_file = directory + "precision.csv"
-	f1_file = directory + "f1.csv"
-
-	#recall
-	with open(recall_file, "w+") as outfile:
-		first_line = ""
-		for learner in learners:
-			first_line += learner + ", "
-		outfile.write(first_line + "\n")
-		#print(len(known_constructions))
-		for i in range(len(known_constructions)):
-			#print(i)
-			curr_line = ""
-			for learner in learners:
-				curr_line += "%s, " % str(recall[i][learner])
-			curr_line += "\n"
-			outfile.write(curr_line)
-
-
-	#precision
-	with open(precision_file, "w+") as outfile:
-		first_line = ""
-		for learner in learners:
-			first_line += learner + ", "
-		outfile.write(first_line + "\n")
-		for i in range(len(known_constructions)):
-			curr_line = ""
-			for learner in learners:
-				curr_line += "%s, " % str(precision[i][learner])
-			curr_line += "\n"
-			outfile.write(curr_line)
-
-	#f1
-	with open(f1_file, "w+") as outfile:
-		first_line = ""
-		for learner in learners:
-			first_line += learner + ", "
-		outfile.write(first_line + "\n")
-		for i in range(len(known_constructions)):
-			curr_line = ""
-			for learner in learners:
-				curr_line += "%s, " % str(f1[i][learner])
-			curr_line += "\n"
-			outfile.write(curr_line)
+	#each metric is written in one write
+	recall.write(directory + "recall." + OUTPUT_FORMAT, OUTPUT_FORMAT)
+	precision.write(directory + "precision." + OUTPUT_FORMAT, OUTPUT_FORMAT)
+	f1.write(directory + "f1." + OUTPUT_FORMAT, OUTPUT_FORMAT)
+	times.write(directory + "times." + OUTPUT_FORMAT, OUTPUT_FORMAT)
 
 
+#metrics written by run_real_experiments
+METRICS = ["recall", "precision", "f1"]
+
 '''
 Consolidate results
 
-	purpose: Takes the files created by run_real_experiments and averages the
+	purpose: Takes the files created by run_real_experiments and summarizes the
 				scores for each learner to find the overall recall, precision,
 				and f1.
 	inputs: directory is the filepath where the files are stored and where the
 				output should be placed
-	outputs: Creates 3 files:
+	outputs: Creates 4 files:
 				1) average_recall.csv
 				2) average_precision.csv
 				3) average_f1.csv
 				each of these files contains a header with the names of the learners
 					and then a single line containing the average scores for the
 					corresponding metric
+				4) statistics.csv which has a line for every learner and metric
+					with the mean, median and time-weighted mean of the scores.
+					The time-weighted mean weights every score by the number of
+					utterances since the previous child utterance (see 
+					get_time_weights)
 '''
 def consolidate_results(directory):
-	recall_file = directory + "recall.csv"
-	precision_file = directory + "precision.csv"
-	f1_file = directory + "f1.csv"
-
-	########################
-	#		recall
-	########################
-	df = pd.read_csv(recall_file)
-	df = df.drop(labels=" ", axis=1)
-	#total_recall stores an incremental counter for recall scores for each learner. 
-	total_recall = {}
-	for learner in df.keys():
-		total_recall[learner] = 0.0
-	#num_measurements is a counter for the number of measurements
-	num_measurements = 0
-	for i in range(len(df.keys()[0])):
-		num_measurements += 1
-		for learner in df.keys():
-			total_recall[learner] += df[learner][i]
-	for learner in total_recall.keys():
-		total_recall[learner] = total_recall[learner] / num_measurements
-	#write to file
-	outfile_name = directory + "average_recall.csv"
-	with open(outfile_name, "w+") as outfile:
-		first_line = ""
-		for key, value in sorted(total_recall.iteritems(), key=lambda (k,v): (v, k)):
-			first_line += "%s, " % key
-		outfile.write(first_line + "\n")
-		data_line = ""
-		for key, value in sorted(total_recall.iteritems(), key=lambda (k,v): (v, k)):
-			data_line += "%s, " % str(value)
-		outfile.write(data_line + "\n")
-
-	#############################
-	#		Precision
-	#############################
-	df = pd.read_csv(precision_file)
-	df = df.drop(labels=" ", axis=1)
-	#total_recall stores an incremental counter for recall scores for each learner. 
-	total_precision = {}
-	for learner in df.keys():
-		total_precision[learner] = 0.0
-	#num_measurements is a counter for the number of measurements
-	num_measurements = 0
-	for i in range(len(df.keys()[0])):
-		num_measurements += 1
-		for learner in df.keys():
-			total_precision[learner] += df[learner][i]
-	for learner in total_precision.keys():
-		total_precision[learner] = total_precision[learner] / num_measurements
-	#write to file
-	outfile_name = directory + "average_precision.csv"
-	with open(outfile_name, "w+") as outfile:
-		first_line = ""
-		for key, value in sorted(total_precision.iteritems(), key=lambda (k,v): (v, k)):
-			first_line += "%s, " % key
-		outfile.write(first_line + "\n")
-		data_line = ""
-		for key, value in sorted(total_precision.iteritems(), key=lambda (k,v): (v, k)):
-			data_line += "%s, " % str(value)
-		outfile.write(data_line + "\n")
-
-	#################################
-	#				F1
-	#################################
-	df = pd.read_csv(f1_file)
-	df = df.drop(labels=" ", axis=1)
-	#total_recall stores an incremental counter for recall scores for each learner. 
-	total_f1 = {}
-	for learner in df.keys():
-		total_f1[learner] = 0.0
-	#num_measurements is a counter for the number of measurements
-	num_measurements = 0
-	for i in range(len(df.keys()[0])):
-		num_measurements += 1
-		for learner in df.keys():
-			total_f1[learner] += df[learner][i]
-	for learner in total_f1.keys():
-		total_f1[learner] = total_f1[learner] / num_measurements
-	#write to file
-	outfile_name = directory + "average_f1.csv"
-	with open(outfile_name, "w+") as outfile:
-		first_line = ""
-		for key, value in sorted(total_f1.iteritems(), key=lambda (k,v): (v, k)):
-			first_line += "%s, " % key
-		outfile.write(first_line + "\n")
-		data_line = ""
-		for key, value in sorted(total_f1.iteritems(), key=lambda (k,v): (v, k)):
-			data_line += "%s, " % str(value)
-		outfile.write(data_line + "\n")
+	weights = get_time_weights(directory)
+	statistics = []
+	for metric in METRICS:
+		df = Helper.read_columns(directory + metric + "." + OUTPUT_FORMAT)
+		learners = list(df.columns)
+		scores = df.values.astype(np.float64)
+		if (len(scores) == 0):
+			means = medians = weighted_means = np.full(len(learners), np.nan)
+		else:
+			means = scores.mean(axis=0)
+			medians = np.median(scores, axis=0)
+			if (weights is None or len(weights) != len(scores)):
+				weighted_means = means
+			else:
+				weighted_means = np.average(scores, axis=0, weights=weights)
+
+		#write averages sorted by score
+		outfile_name = directory + "average_" + metric + ".csv"
+		averages = sorted(zip(means.tolist(), learners))
+		Helper.write_columns(outfile_name, [learner for mean, learner in averages], [[mean for mean, learner in averages]])
+
+		for i in range(len(learners)):
+			statistics.append((learners[i], metric, means[i], medians[i], weighted_means[i]))
+
+	statistics = pd.DataFrame(statistics, columns=["learner", "metric", "mean", "median", "time_weighted_mean"])
+	statistics.to_csv(directory + "statistics.csv", index=False)
+	return statistics
+
+
+'''
+Get time weights
+
+	inputs: directory is the filepath of the files created by 
+			run_real_experiments
+	outputs: returns the number of utterances between every child utterance
+			and the previous one (the time the learners had to reach the
+			state they were scored in), or None if there is no times file
+'''
+def get_time_weights(directory):
+	filename = directory + "times." + OUTPUT_FORMAT
+	if (not os.path.exists(filename)):
+		return None
+	times = Helper.read_columns(filename).values[:, 0].astype(np.float64)
+	return np.diff(np.concatenate([[0], times]))
 
 def main():
 	###############################################################
 	#	get constructions and data_distribution from speech data
 	###############################################################
-	#print("Extracting data")
+	Helper.log("Extracting data")
+	#the corpus is read once and used for every seed. Only the raw files 
+	#have the transcriptions that are printed at VERBOSE
+	use_cache = USE_CORPUS_CACHE and not Helper.is_logged(Helper.VERBOSE)
 	speech_data = Extract_data.SpeechData()
-	#speech_data.add_from_dir(DATA_DIR)
+	speech_data.add_from_dir(DATA_DIR, PROCESSES, use_cache=use_cache)
 
 
 	###################################################
@@ -350,94 +304,61 @@ def main():
 	###################################################
 	if not os.path.exists(OUTPUT_DIRECTORY):
 		os.makedirs(OUTPUT_DIRECTORY)
-		print("making directory '%s'" % OUTPUT_DIRECTORY)
+		Helper.log("making directory '%s'" % OUTPUT_DIRECTORY)
 
 
 	######################################
 	#			set up learners
 	######################################
-	print("Setting up Learners")
-	learners = {}
-
-	#frequentist
-	learners["frequentist_1"] = Learner.FrequentistLearner(learn_times=1)
-	learners["frequentist_2"] = Learner.FrequentistLearner(learn_times=2)
-	learners["frequentist_3"] = Learner.FrequentistLearner(learn_times=3)
-	learners["frequentist_5"] = Learner.FrequentistLearner(learn_times=5)
-	learners["frequentist_10"] = Learner.FrequentistLearner(learn_times=10)
-	learners["frequentist_15"] = Learner.FrequentistLearner(learn_times=15)
-	#Complexity-Based
-	learners["ComplexityBased_1"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:1})
-	learners["ComplexityBased_09_1"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9})
-	learners["ComplexityBased_09_2"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.8})
-	learners["ComplexityBased_09_3"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.7})
-	learners["ComplexityBased_09_4"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.6})
-	learners["ComplexityBased_09_5"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.5})
-	learners["ComplexityBased_09_6"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.4})
-	learners["ComplexityBased_09_7"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.4, 3.0:0.2})
-	learners["ComplexityBased_09_8"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.4, 2.5: 0.2, 3.0:0.1})
-	learners["ComplexityBased_09_9"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.9, 2.0:0.4, 2.5: 0.1, 3.0:0.05})
-	learners["ComplexityBased_08_1"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8})
-	learners["ComplexityBased_08_2"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.7})
-	learners["ComplexityBased_08_3"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.6})
-	learners["ComplexityBased_08_4"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.5})
-	learners["ComplexityBased_08_5"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.4})
-	learners["ComplexityBased_08_6"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.4, 3.0:0.2})
-	learners["ComplexityBased_08_7"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.4, 2.5: 0.2, 3.0:0.1})
-	learners["ComplexityBased_08_8"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.8, 2.0:0.4, 2.5: 0.1, 3.0:0.05})
-	learners["ComplexityBased_07_1"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7})
-	learners["ComplexityBased_07_2"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.6})
-	learners["ComplexityBased_07_3"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.5})
-	learners["ComplexityBased_07_4"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.4})
-	learners["ComplexityBased_07_5"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.4, 3.0:0.2})
-	learners["ComplexityBased_07_6"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.4, 2.5: 0.2, 3.0:0.1})
-	learners["ComplexityBased_07_7"] = Learner.ComplexityBasedLearner(probability_dict={0.5: 1, 1.0:0.7, 2.0:0.4, 2.5: 0.1, 3.0:0.05})
-	#Threshold
-	learners["Threshold_10_10"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:10})
-	learners["Threshold_10_8_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8})
-	learners["Threshold_10_8_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6})
-	learners["Threshold_10_8_"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 3.0:4})
-	learners["Threshold_10_8_3"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4, 3.0: 2})
-	learners["Threshold_10_8_4"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4, 3.0: 2})
-	learners["Threshold_10_8_5"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4, 3.0: 1})
-	learners["Threshold_10_8_6"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 4})
-	learners["Threshold_10_8_7"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 3, 3.0: 2})
-	learners["Threshold_10_8_8"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 3, 3.0: 1})
-	learners["Threshold_10_8_9"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 3})
-	learners["Threshold_10_8_10"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:8, 1.5:7, 2.0:6, 2.5: 1})
-	learners["Threshold_10_6_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6})
-	learners["Threshold_10_6_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5: 5, 2.0: 4})
-	learners["Threshold_10_6_3"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5: 4, 2.0: 2})
-	learners["Threshold_10_6_4"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:4, 2.0: 2, 2.5: 1})
-	learners["Threshold_10_6_5"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:4, 2.0: 1})
-	learners["Threshold_10_6_6"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:2, 2.0: 1})
-	learners["Threshold_10_6_7"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:3, 2.0: 2})
-	learners["Threshold_10_6_8"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:6, 1.5:2, 2.0: 1})
-	learners["Threshold_10_4_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:4, 1.5:3, 2.0: 2})
-	learners["Threshold_10_4_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:4, 1.5:2, 2.0: 1})
-	learners["Threshold_10_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 10, 1.0:2, 1.5:1})
-	learners["Threshold_8_6_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6})
-	learners["Threshold_8_6_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5: 5, 2.0: 4})
-	learners["Threshold_8_6_3"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5: 4, 2.0: 2})
-	learners["Threshold_8_6_4"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:4, 2.0: 2, 2.5: 1})
-	learners["Threshold_8_6_5"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:4, 2.0: 1})
-	learners["Threshold_8_6_6"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:2, 2.0: 1})
-	learners["Threshold_8_6_7"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:3, 2.0: 2})
-	learners["Threshold_8_6_8"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:6, 1.5:2, 2.0: 1})
-	learners["Threshold_8_4_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:4, 1.5:3, 2.0: 2})
-	learners["Threshold_8_4_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:4, 1.5:2, 2.0: 1})
-	learners["Threshold_8_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 8, 1.0:2, 1.5:1})
-	learners["Threshold_6_4_1"] = Learner.ThresholdLearner(complexity_dict={0.5: 6, 1.0:4, 1.5:3, 2.0: 2})
-	learners["Threshold_6_4_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 6, 1.0:4, 1.5:2, 2.0: 1})
-	learners["Threshold_6_2"] = Learner.ThresholdLearner(complexity_dict={0.5: 6, 1.0:2, 1.5:1})
-
-	run_real_experiments(speech_data, learners, OUTPUT_DIRECTORY)
-	consolidate_results(OUTPUT_DIRECTORY)
+	Helper.log("Setting up Learners")
+	#learners are built from a spec (see Sweep.py). Learners of a type 
+	#that can share work are simulated together
+	if (SWEEP_FILE):
+		sweep = Sweep.load_spec(SWEEP_FILE)
+	else:
+		sweep = Sweep.Sweep(Sweep.DEFAULT_SPEC)
+
+	if (DISTANCE_CACHE_FILE):
+		Helper.DISTANCE_CACHE.load(DISTANCE_CACHE_FILE)
+	if (USE_DISTANCE_MATRIX):
+		Helper.log("Loading distance matrix")
+		Helper.set_distance_matrix(Extract_data.load_distance_matrix(DATA_DIR, 
+			speech_data.get_whole_construction_list(), PROCESSES, USE_CORPUS_CACHE))
+	#every seed of the sweep is a separate run of the experiments
+	seeds = sweep.get_seeds()
+	for seed in seeds:
+		output_dir = OUTPUT_DIRECTORY
+		if (len(seeds) > 1):
+			output_dir += "seed_%s/" % seed
+			if not os.path.exists(output_dir):
+				os.makedirs(output_dir)
+		#seeds the complexity-based learners
+		random.seed(seed)
+		run_real_experiments(speech_data, sweep.build(), output_dir)
+		consolidate_results(output_dir)
+	if (DISTANCE_CACHE_FILE):
+		cache = Helper.DISTANCE_CACHE
+		Helper.log("Saving distance cache: %s hits, %s misses, %s distances" % 
+			(cache.get_hits(), cache.get_misses(), len(cache)))
+		cache.save(DISTANCE_CACHE_FILE)
 
 if __name__ == "__main__":
-	DATA_DIR = sys.argv[1];
+	parser = argparse.ArgumentParser(description="Tests learners on a CHILDES corpus")
+	parser.add_argument("data_dir", help="directory with the .cha files")
+	parser.add_argument("-q", "--quiet", dest="verbosity", action="store_const",
+		const=Helper.SILENT, default=Helper.PROGRESS, help="print nothing")
+	parser.add_argument("-v", "--verbose", dest="verbosity", action="store_const",
+		const=Helper.VERBOSE, help="print every file read and every utterance")
+	parser.add_argument("--sweep", default=None,
+		help="json file with the spec of the learners (see Sweep.py)")
+	args = parser.parse_args()
+	Helper.set_verbosity(args.verbosity)
+	SWEEP_FILE = args.sweep
+
+	DATA_DIR = args.data_dir
 	#make sure DATA_DIR ends with "/"
 	if (DATA_DIR[-1] != "/"):
 		DATA_DIR += "/"
 	OUTPUT_DIRECTORY = "results/real_data/" + DATA_DIR
+	DISTANCE_CACHE_FILE = OUTPUT_DIRECTORY + "distance_cache.pkl"
 	main()
\ No newline at end of file